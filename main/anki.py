@@ -0,0 +1,235 @@
+import base64
+import hashlib
+import html
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import zipfile
+from collections.abc import Callable, Iterable
+
+# Anki collection schema (version 11), as found in collection.anki2 inside an .apkg
+_SCHEMA = """
+CREATE TABLE col (
+    id integer primary key, crt integer not null, mod integer not null, scm integer not null,
+    ver integer not null, dty integer not null, usn integer not null, ls integer not null,
+    conf text not null, models text not null, decks text not null, dconf text not null, tags text not null
+);
+CREATE TABLE notes (
+    id integer primary key, guid text not null, mid integer not null, mod integer not null,
+    usn integer not null, tags text not null, flds text not null, sfld integer not null,
+    csum integer not null, flags integer not null, data text not null
+);
+CREATE TABLE cards (
+    id integer primary key, nid integer not null, did integer not null, ord integer not null,
+    mod integer not null, usn integer not null, type integer not null, queue integer not null,
+    due integer not null, ivl integer not null, factor integer not null, reps integer not null,
+    lapses integer not null, left integer not null, odue integer not null, odid integer not null,
+    flags integer not null, data text not null
+);
+CREATE TABLE revlog (
+    id integer primary key, cid integer not null, usn integer not null, ease integer not null,
+    ivl integer not null, lastIvl integer not null, factor integer not null, time integer not null,
+    type integer not null
+);
+CREATE TABLE graves (usn integer not null, oid integer not null, type integer not null);
+CREATE INDEX ix_notes_usn on notes (usn);
+CREATE INDEX ix_cards_usn on cards (usn);
+CREATE INDEX ix_revlog_usn on revlog (usn);
+CREATE INDEX ix_cards_nid on cards (nid);
+CREATE INDEX ix_cards_sched on cards (did, queue, due);
+CREATE INDEX ix_revlog_cid on revlog (cid);
+CREATE INDEX ix_notes_csum on notes (csum);
+"""
+
+# Note type fields, in order; the first one is the sort field
+MODEL_FIELDS = ("Word", "Definitions", "Pronunciation", "Examples", "Audio")
+MODEL_NAME = "AnkiVocab"
+_QFMT = "{{Word}}<br>{{Audio}}"
+_AFMT = "{{FrontSide}}<hr id=answer>{{Pronunciation}}<br>{{Definitions}}<br><br>{{Examples}}"
+_CSS = ".card { font-family: arial; font-size: 20px; text-align: center; color: black; background-color: white; }"
+
+def field_checksum(value: str) -> int:
+    '''Anki's checksum of a sort field: the first 8 hex digits of its sha1'''
+    return int(hashlib.sha1(value.encode()).hexdigest()[:8], 16)
+
+def note_guid(word: str) -> str:
+    '''A stable guid per word, so re-imported notes update instead of duplicating'''
+    return base64.b64encode(hashlib.sha1(f"ankivocab:{word}".encode()).digest()[:8]).decode()
+
+def _html_list(values) -> list[str]:
+    '''Flattens a to_dict() field (str, list, or dict of either) into escaped HTML lines'''
+    if not values:
+        return []
+    if isinstance(values, str):
+        return [html.escape(values)]
+    if isinstance(values, dict):
+        lines = []
+        for key, value in values.items():
+            if isinstance(value, list):
+                value = "; ".join(f"{idx}. {item}" for idx, item in enumerate(value, start=1))
+            lines.append(f"<b>{html.escape(key)}</b> {html.escape(value)}")
+        return lines
+    return [html.escape(value) for value in values]
+
+def note_fields(entry: dict, media_names: Iterable[str] = ()) -> list[str]:
+    '''Formats a to_dict() entry as the MODEL_FIELDS of a note'''
+    return [
+        html.escape(entry["target_word"]),
+        "<br>".join(_html_list(entry.get("definitions"))),
+        ", ".join(_html_list(entry.get("pronunciations"))),
+        "<br>".join(_html_list(entry.get("examples"))),
+        "".join(f"[sound:{name}]" for name in media_names),
+    ]
+
+def _model(mid: int, did: int, now: int) -> dict:
+    return {
+        "id": mid, "name": MODEL_NAME, "type": 0, "mod": now, "usn": -1, "sortf": 0, "did": did,
+        "tmpls": [{"name": "Card 1", "ord": 0, "qfmt": _QFMT, "afmt": _AFMT, "did": None, "bqfmt": "", "bafmt": ""}],
+        "flds": [{"name": name, "ord": ord, "sticky": False, "rtl": False, "font": "Arial", "size": 20, "media": []}
+                 for ord, name in enumerate(MODEL_FIELDS)],
+        "css": _CSS,
+        "latexPre": "\\documentclass[12pt]{article}\n\\special{papersize=3in,5in}\n\\usepackage[utf8]{inputenc}\n"
+                    "\\usepackage{amssymb,amsmath}\n\\pagestyle{empty}\n\\setlength{\\parindent}{0in}\n\\begin{document}\n",
+        "latexPost": "\\end{document}",
+        "req": [[0, "any", [0]]], "tags": [], "vers": [],
+    }
+
+def _deck(did: int, name: str, now: int) -> dict:
+    return {
+        "id": did, "name": name, "mod": now, "usn": -1, "desc": "", "dyn": 0, "conf": 1, "collapsed": False,
+        "lrnToday": [0, 0], "revToday": [0, 0], "newToday": [0, 0], "timeToday": [0, 0],
+        "extendNew": 10, "extendRev": 50,
+    }
+
+_DCONF = {
+    "1": {
+        "id": 1, "name": "Default", "mod": 0, "usn": 0, "maxTaken": 60, "autoplay": True, "timer": 0,
+        "replayq": True, "dyn": False,
+        "new": {"delays": [1, 10], "ints": [1, 4, 7], "initialFactor": 2500, "order": 1, "perDay": 20,
+                "bury": False, "separate": True},
+        "rev": {"perDay": 200, "ease4": 1.3, "fuzz": 0.05, "minSpace": 1, "ivlFct": 1, "maxIvl": 36500,
+                "bury": False, "hardFactor": 1.2},
+        "lapse": {"delays": [10], "mult": 0, "minInt": 1, "leechFails": 8, "leechAction": 0},
+    }
+}
+
+class ApkgWriter:
+    """
+    Streams notes into an Anki package (.apkg).
+    Notes are inserted into a temporary collection in batches of batch_size, and media
+    files are only referenced by path until close() streams them into the zip,
+    so memory stays bounded however many notes are written.
+    """
+
+    def __init__(self, path: str, deck_name: str = "AnkiVocab", batch_size: int = 500,
+                 mid: int | None = None, did: int | None = None):
+        self.path = path
+        self.deck_name = deck_name
+        self.batch_size = batch_size
+        self.count = 0
+        now = int(time.time())
+        self._now = now
+        # Note, card, model and deck ids are millisecond timestamps in Anki
+        self._next_id = now * 1000
+        # Reusing an existing collection's note type and deck ids makes Anki update its notes on import
+        self.mid = mid or self._new_id()
+        self.did = did or self._new_id()
+        self._pending_notes = []
+        self._pending_cards = []
+        # media file name in the package -> local path
+        self._media: dict[str, str] = {}
+        self._media_names: dict[str, str] = {}
+        fd, self._db_path = tempfile.mkstemp(suffix=".anki2")
+        os.close(fd)
+        self.conn = sqlite3.connect(self._db_path)
+        self.conn.executescript(_SCHEMA)
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def _media_name(self, file: str) -> str:
+        '''Returns the package name of a media file, adding it on first use'''
+        if file in self._media_names:
+            return self._media_names[file]
+        name = os.path.basename(file)
+        if name in self._media:
+            stem, ext = os.path.splitext(name)
+            name = f"{stem}-{len(self._media)}{ext}"
+        self._media[name] = file
+        self._media_names[file] = name
+        return name
+
+    def add(self, entry: dict, media: Iterable[str] = ()) -> None:
+        '''Adds a note for a to_dict() entry, with media given as local file paths'''
+        fields = note_fields(entry, [self._media_name(file) for file in media])
+        nid = self._new_id()
+        self._pending_notes.append((nid, note_guid(entry["target_word"]), self.mid, self._now, -1, "",
+                                    "\x1f".join(fields), fields[0], field_checksum(fields[0]), 0, ""))
+        self._pending_cards.append((self._new_id(), nid, self.did, 0, self._now, -1, 0, 0, self.count + 1,
+                                    0, 0, 0, 0, 0, 0, 0, 0, ""))
+        self.count += 1
+        if len(self._pending_notes) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        '''Writes the pending batch of notes and cards in one transaction'''
+        with self.conn:
+            self.conn.executemany("INSERT INTO notes VALUES (?,?,?,?,?,?,?,?,?,?,?)", self._pending_notes)
+            self.conn.executemany("INSERT INTO cards VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)", self._pending_cards)
+        self._pending_notes = []
+        self._pending_cards = []
+
+    def _write_col(self) -> None:
+        now_ms = self._now * 1000
+        conf = {"activeDecks": [1], "curDeck": 1, "newSpread": 0, "collapseTime": 1200, "timeLim": 0,
+                "estTimes": True, "dueCounts": True, "curModel": self.mid, "nextPos": self.count + 1,
+                "sortType": "noteFld", "sortBackwards": False, "addToCur": True}
+        decks = {"1": _deck(1, "Default", self._now), str(self.did): _deck(self.did, self.deck_name, self._now)}
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO col VALUES (1, ?, ?, ?, 11, 0, 0, 0, ?, ?, ?, ?, '{}')",
+                (self._now - self._now % 86400, now_ms, now_ms, json.dumps(conf),
+                 json.dumps({str(self.mid): _model(self.mid, self.did, self._now)}),
+                 json.dumps(decks), json.dumps(_DCONF)),
+            )
+
+    def close(self) -> None:
+        '''Finishes the collection and writes the package'''
+        self.flush()
+        self._write_col()
+        self.conn.close()
+        try:
+            with zipfile.ZipFile(self.path, "w", zipfile.ZIP_DEFLATED) as package:
+                package.write(self._db_path, "collection.anki2")
+                # Media are stored as numbered entries, mapped back to their names by the "media" file
+                mapping = {}
+                for idx, (name, file) in enumerate(self._media.items()):
+                    package.write(file, str(idx), compress_type=zipfile.ZIP_STORED)
+                    mapping[str(idx)] = name
+                package.writestr("media", json.dumps(mapping))
+        finally:
+            os.remove(self._db_path)
+
+    def __enter__(self) -> "ApkgWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.conn.close()
+            os.remove(self._db_path)
+
+def export_apkg(entries: Iterable[dict], path: str, deck_name: str = "AnkiVocab",
+                media_for: Callable[[dict], Iterable[str]] | None = None, batch_size: int = 500) -> int:
+    """
+    Writes to_dict() entries from any iterable (e.g. a generator over a word list) to an .apkg.
+    media_for maps an entry to the local paths of its media files. Returns the number of notes.
+    """
+    with ApkgWriter(path, deck_name, batch_size) as writer:
+        for entry in entries:
+            writer.add(entry, media_for(entry) if media_for else ())
+    return writer.count
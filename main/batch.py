@@ -0,0 +1,83 @@
+import asyncio
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+
+from .fetch import Fetcher
+from .lemmas import LemmaIndex
+from .lib import SOURCES, DefinitionNotFoundError
+from .parsing import DEFAULT_BACKEND
+from .scheduler import BULK, default_scheduler
+
+@dataclass
+class LookupResult:
+    # word is the looked-up word, data its to_dict() output
+    word: str
+    data: dict | None = None
+    # error is set instead of data when the lookup failed
+    error: Exception | None = None
+
+async def lookup_many(words: Iterable[str], source: str = "wordreference", concurrency: int = 8,
+                      fetcher: Fetcher | None = None, parser: str = DEFAULT_BACKEND,
+                      fields: Iterable[str] | None = None, lemmas: LemmaIndex | None = None) -> AsyncIterator[LookupResult]:
+    """
+    Looks up every word on the given source and yields a LookupResult per word
+    as soon as it finishes (not in input order).
+    At most `concurrency` lookups are in flight at once, sharing one connection pool.
+    `fields` limits each result to those to_dict() fields.
+    With a LemmaIndex, known inflected forms are looked up as their lemma before any request
+    (one fetch per lemma in flight), and the inflections of inflection-only pages scraped along
+    the way are added to it.
+    """
+    entry_cls = SOURCES[source]
+    fields = None if fields is None else tuple(fields)
+    fetcher = fetcher or Fetcher(pool_size=concurrency, scheduler=default_scheduler(), priority=BULK)
+
+    def parse(word: str, html: bytes) -> tuple[dict, bool]:
+        '''Returns the to_dict() output and whether the page only lists the word's inflections'''
+        entry = entry_cls(word, html=html, parser=parser)
+        data = entry.to_dict(fields)
+        if lemmas is None or not data.get("inflections"):
+            return data, False
+        if "definitions" in data:
+            return data, data["definitions"] == ""
+        try:
+            return data, entry.get_definitions() == ""
+        except DefinitionNotFoundError:
+            return data, False
+
+    async def fetch_and_parse(word: str) -> dict:
+        html = await asyncio.to_thread(fetcher.fetch, source, word)
+        data, inflection_only = await asyncio.to_thread(parse, word, html)
+        # A word with definitions of its own (e.g. the noun "livre") must keep resolving to itself
+        if inflection_only:
+            lemmas.add_inflections(word, data["inflections"])
+        return data
+
+    # Lookups in flight, by the word actually fetched, so that forms sharing a lemma share a fetch
+    inflight: dict[str, asyncio.Task] = {}
+
+    async def lookup(word: str) -> LookupResult:
+        target = lemmas.resolve(word) if lemmas is not None else word
+        task = inflight.get(target)
+        if task is None:
+            task = inflight[target] = asyncio.create_task(fetch_and_parse(target))
+            task.add_done_callback(lambda _: inflight.pop(target, None))
+        try:
+            data = await asyncio.shield(task)
+        except Exception as e:
+            # Including extraction bugs on an odd page, so that one word can't end the batch
+            return LookupResult(word, error=e)
+        return LookupResult(word, data=data)
+
+    # Only pull as many words from the iterable as there are free slots
+    pending = set()
+    for word in words:
+        if len(pending) >= concurrency:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+        pending.add(asyncio.create_task(lookup(word)))
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            yield task.result()
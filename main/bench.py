@@ -0,0 +1,349 @@
+"""
+Offline throughput benchmark for WordReference and Wiktionnaire.
+
+Serves saved (or synthetic) pages from a local HTTP server and runs batches of lookups
+against it, reporting words/sec, p50/p99 latency per stage (fetch, parse, extract,
+serialize) and peak RSS. Each batch runs in a fresh process so peak RSS is per batch.
+
+Usage:
+    python -m main.bench                         # synthetic pages, all sources
+    python -m main.bench --pages pages/ --parser lxml-subtree --concurrency 8
+    python -m main.bench --json run.json --baseline previous.json
+    python -m main.bench --memory 500            # per-entry footprint, entry objects vs Entry records
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from .compare_parsers import load_pages
+from .errors import DefinitionNotFoundError
+from .fetch import Fetcher
+from .lib import SOURCES
+from .parsing import BACKENDS, DEFAULT_BACKEND
+
+STAGES = ("fetch", "parse", "extract", "serialize")
+BATCH_SIZES = (10, 100, 1000, 10000)
+
+def synthetic_wordreference(word: str, senses: int = 8) -> bytes:
+    '''Builds a WordReference-like page with the given number of senses'''
+    rows = []
+    for i in range(senses):
+        cls = "even" if i % 2 == 0 else "odd"
+        rows.append(
+            f'<tr class="{cls}" id="fren:{i}"><td class="FrWrd"><strong>{word}</strong> <em class="POS2">nf</em></td>'
+            f'<td> <span class="dsense">(sens {i})</span></td><td class="ToWrd">gloss {i} <em>n</em></td></tr>'
+            f'<tr class="{cls}"><td>&nbsp;</td><td colspan="2" class="FrEx">Exemple {i} avec {word}.</td></tr>'
+            f'<tr class="{cls}"><td>&nbsp;</td><td colspan="2" class="ToEx">Example {i}.</td></tr>'
+        )
+    nav = "".join(f'<li><a href="/fren/link{i}">link {i}</a></li>' for i in range(200))
+    return (
+        f'<html><head><script>var ads = {list(range(50))};</script></head><body><ul id="nav">{nav}</ul>'
+        f'<div id="articleHead"><h3>{word}</h3><span class="pronWR">/{word}/</span>'
+        f"<script>var audioFiles = ['/audio/fr/{word}.mp3'];</script></div>"
+        f'<div id="articleWRD"><table class="WRD"><tr class="wrtopsection"><td colspan="3" title="Principal Translations">Principal</td></tr>'
+        f'{"".join(rows)}</table>'
+        f'<table class="WRD"><tr class="wrtopsection"><td colspan="3" title="Formes composées">Formes</td></tr>'
+        f'<tr class="even" id="fren:c"><td class="FrWrd"><strong>{word} de terre</strong> <em>nf</em></td><td></td>'
+        f'<td class="ToWrd">compound</td></tr></table></div>'
+        f'<script>var ads = {list(range(10))};</script><div class="inflectionsSection"><dl><dt><a href="/conj/">{word}r</a></dt><dt><b>{word}</b></dt>'
+        f'<dd>indicatif présent</dd></dl></div><div id="footer">{nav}</div></body></html>'
+    ).encode()
+
+def _other_language(word: str, heading: str, ipa: str) -> str:
+    '''A Wiktionnaire language section other than Français, read by none of the getters'''
+    return (f'<div class="mw-heading mw-heading2"><h2 id="{heading}">{heading}</h2></div>'
+            f'<p><b>{word}</b> <span class="API">\\{ipa}\\</span> '
+            f'<span class="ligne-de-forme"><i>masculin</i></span></p>'
+            f'<ol><li>{heading} sense of {word}.</li></ol>'
+            f'<audio class="mw-file-element" resource="//upload.wikimedia.org/{heading}-{word}.ogg"></audio>')
+
+def synthetic_wiktionnaire(word: str, definitions: int = 6, multilingual: bool = False) -> bytes:
+    """
+    Builds a Wiktionnaire-like page with a masculine and a feminine word group; a multilingual
+    page also has a Conventions internationales section before Français and an Anglais one after.
+    """
+    groups = []
+    for gender in ("masculin", "féminin"):
+        items = "".join(f'<li>Définition {i} de {word}.<ul><li><span>Exemple {i}.</span></li></ul></li>'
+                        for i in range(definitions))
+        groups.append(f'<p><b>{word}</b> <span class="API">\\{word}\\</span> '
+                      f'<span class="ligne-de-forme"><i>{gender}</i></span></p><ol>{items}</ol>')
+    nav = "".join(f'<li><a href="/wiki/link{i}">link {i}</a></li>' for i in range(200))
+    return (
+        f'<html><body><ul id="nav">{nav}</ul><div class="mw-content-ltr mw-parser-output">'
+        f'{_other_language(word, "Conventions_internationales", "kɔ̃v") if multilingual else ""}'
+        f'<div class="mw-heading mw-heading2"><h2 id="Français">Français</h2></div>{"".join(groups)}'
+        f'<audio class="mw-file-element" resource="//upload.wikimedia.org/{word}.ogg"></audio>'
+        f'<ol><li>Traductions</li></ol>'
+        f'{_other_language(word, "Anglais", "tʃæt") if multilingual else ""}</div></body></html>'
+    ).encode()
+
+SYNTHETIC = {
+    "wordreference": synthetic_wordreference,
+    "wiktionnaire": synthetic_wiktionnaire,
+}
+
+class PageServer:
+    """
+    Local HTTP stand-in for the dictionary sites, serving /<source>/<word>.
+    Words without a saved page get one of the saved pages, picked by hashing the word,
+    so any batch size can be served from a small corpus.
+    Pages carry an ETag and are answered with a 304 when If-None-Match matches it;
+    setting fail_next makes the next requests fail with fail_status, to exercise retries.
+    MediaWiki API calls to /api/<source>?<query> are answered from `api`, recorded
+    responses keyed by source and query string.
+    """
+
+    def __init__(self, pages: dict[str, dict[str, bytes]], api: dict[str, dict[str, bytes]] | None = None):
+        self.pages = pages
+        self.api = api or {}
+        self.requests = 0
+        self.not_modified = 0
+        self.fail_next = 0
+        self.fail_status = 503
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path, _, query = self.path.partition("?")
+                _, source, word = (path.split("/", 2) + ["", ""])[:3]
+                if source == "api":
+                    body = server.api.get(word, {}).get(query)
+                else:
+                    body = server.page(source, unquote(word))
+                server.requests += 1
+                if server.fail_next > 0:
+                    server.fail_next -= 1
+                    self.send_response(server.fail_status)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if body is None:
+                    self.send_error(404)
+                    return
+                etag = f'"{zlib.crc32(body):08x}"'
+                if self.headers.get("If-None-Match") == etag:
+                    server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def page(self, source: str, word: str) -> bytes | None:
+        pages = self.pages.get(source)
+        if not pages:
+            return None
+        if word in pages:
+            return pages[word]
+        saved = sorted(pages)
+        return pages[saved[zlib.crc32(word.encode()) % len(saved)]]
+
+    @property
+    def urls(self) -> dict[str, str]:
+        '''URL templates pointing a Fetcher at this server'''
+        host, port = self.httpd.server_address[:2]
+        return {source: f"http://{host}:{port}/{source}/{{word}}" for source in SOURCES}
+
+    @property
+    def api_urls(self) -> dict[str, str]:
+        '''API endpoints pointing a Fetcher at this server'''
+        host, port = self.httpd.server_address[:2]
+        return {source: f"http://{host}:{port}/api/{source}" for source in SOURCES}
+
+    def __enter__(self) -> "PageServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def percentile(values: list[float], pct: float) -> float:
+    '''Nearest-rank percentile of a list of values'''
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def run_batch(source: str, words: list[str], urls: dict[str, str], parser: str, concurrency: int) -> dict:
+    '''Looks up every word against the local server, timing each stage'''
+    entry_cls = SOURCES[source]
+    fetcher = Fetcher(pool_size=concurrency, urls=urls)
+    timings = {stage: [] for stage in STAGES}
+    lock = threading.Lock()
+    errors = 0
+
+    def lookup(word: str) -> None:
+        nonlocal errors
+        marks = [time.perf_counter()]
+        try:
+            html = fetcher.fetch(source, word)
+            marks.append(time.perf_counter())
+            entry = entry_cls(word, html=html, parser=parser)
+            entry.soup
+            marks.append(time.perf_counter())
+            data = entry.to_dict()
+            marks.append(time.perf_counter())
+            json.dumps(data, ensure_ascii=False)
+            marks.append(time.perf_counter())
+        except DefinitionNotFoundError:
+            with lock:
+                errors += 1
+            return
+        with lock:
+            for stage, begin, end in zip(STAGES, marks, marks[1:]):
+                timings[stage].append(end - begin)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lookup, words))
+    elapsed = time.perf_counter() - start
+    return {
+        "source": source,
+        "batch_size": len(words),
+        "parser": parser,
+        "concurrency": concurrency,
+        "words_per_sec": len(words) / elapsed,
+        "errors": errors,
+        "latency_ms": {stage: {"p50": percentile(values, 50) * 1000, "p99": percentile(values, 99) * 1000}
+                       for stage, values in timings.items()},
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+def _run_isolated(queue, *args) -> None:
+    queue.put(run_batch(*args))
+
+def run_isolated(*args) -> dict:
+    '''Runs run_batch in a fresh process so that its peak RSS is its own'''
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run_isolated, args=(queue, *args))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+def measure_footprint(source: str, pages: dict[str, bytes], count: int, parser: str) -> tuple[float, float]:
+    """
+    Returns the memory in bytes retained per entry when keeping `count` extracted entries,
+    first as entry objects after to_dict() (parse trees alive), then as Entry records from extract().
+    """
+    entry_cls = SOURCES[source]
+    saved = sorted(pages)
+    footprints = []
+    for keep_tree in (True, False):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        kept = []
+        for i in range(count):
+            entry = entry_cls(f"mot{i}", html=pages[saved[i % len(saved)]], parser=parser)
+            if keep_tree:
+                entry.to_dict()
+                kept.append(entry)
+            else:
+                kept.append(entry.extract())
+        gc.collect()
+        footprints.append((tracemalloc.get_traced_memory()[0] - before) / count)
+        del kept
+        tracemalloc.stop()
+    return footprints[0], footprints[1]
+
+def print_report(results: list[dict]) -> None:
+    header = f"{'source':<15}{'batch':>7}{'words/s':>10}"
+    for stage in STAGES:
+        header += f"{stage + ' p50/p99 ms':>24}"
+    print(header + f"{'peak RSS MiB':>14}")
+    for result in results:
+        line = f"{result['source']:<15}{result['batch_size']:>7}{result['words_per_sec']:>10.1f}"
+        for stage in STAGES:
+            latency = result["latency_ms"][stage]
+            line += f"{latency['p50']:>13.2f} /{latency['p99']:>8.2f}"
+        print(line + f"{result['peak_rss_mib']:>14.1f}")
+
+def check_regressions(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    '''Lists runs whose throughput dropped more than `tolerance` below the baseline run with the same settings'''
+    key = lambda r: (r["source"], r["batch_size"], r["parser"], r["concurrency"])
+    previous = {key(r): r for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(key(result))
+        if before and result["words_per_sec"] < before["words_per_sec"] * (1 - tolerance):
+            regressions.append(f"{result['source']} x{result['batch_size']}: "
+                               f"{before['words_per_sec']:.1f} -> {result['words_per_sec']:.1f} words/s")
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", help="directory of saved pages, one subdirectory per source (default: synthetic)")
+    parser.add_argument("--source", action="append", choices=list(SOURCES), help="source to benchmark (default: all)")
+    parser.add_argument("--batch", action="append", type=int, help=f"batch size (default: {BATCH_SIZES})")
+    parser.add_argument("--parser", default=DEFAULT_BACKEND, choices=list(BACKENDS))
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="results file of an earlier run to compare throughput against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed throughput drop vs the baseline")
+    parser.add_argument("--memory", type=int, metavar="N",
+                        help="instead of throughput, measure the per-entry footprint of keeping N entries")
+    args = parser.parse_args()
+
+    sources = args.source or list(SOURCES)
+    if args.pages:
+        pages = {source: {} for source in sources}
+        for source, word, html in load_pages(args.pages):
+            if source in pages:
+                pages[source][word] = html
+    else:
+        pages = {source: {f"mot{i}": SYNTHETIC[source](f"mot{i}") for i in range(20)} for source in sources}
+
+    if args.memory:
+        print(f"{'source':<15}{'with tree KiB':>15}{'Entry KiB':>12}{'saved':>8}")
+        for source in sources:
+            with_tree, record = measure_footprint(source, pages[source], args.memory, args.parser)
+            print(f"{source:<15}{with_tree / 1024:>15.1f}{record / 1024:>12.1f}{1 - record / with_tree:>8.0%}")
+        return
+
+    results = []
+    with PageServer(pages) as server:
+        for source in sources:
+            for size in args.batch or BATCH_SIZES:
+                words = [f"mot{i}" for i in range(size)]
+                results.append(run_isolated(source, words, server.urls, args.parser, args.concurrency))
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = check_regressions(results, json.load(f), args.tolerance)
+        if regressions:
+            print("Throughput regressions:", *regressions, sep="\n  ")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import hashlib
+import os
+import struct
+import threading
+import time
+import unicodedata
+import zlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+# Each cache file starts with a format tag, the time the response was stored and the lengths
+# of its ETag and Last-Modified validators, which follow the header
+_MAGIC = b"AVC2"
+_HEADER = struct.Struct(">4sdHH")
+
+# Sources whose page titles are case-sensitive ("Paris" and "paris" are different Wiktionnaire articles)
+CASE_SENSITIVE = {"wiktionnaire"}
+
+def normalize_word(word: str, source: str | None = None) -> str:
+    """
+    Normalizes a word for use in cache keys: NFC and stripped, and lowercased unless the
+    source's titles are case-sensitive. Derived keys such as "wiktionnaire#Français" count
+    as their source.
+    """
+    word = unicodedata.normalize("NFC", word).strip()
+    if source is not None and source.partition("#")[0] in CASE_SENSITIVE:
+        return word
+    return word.lower()
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    # fresh is False once the entry is past its TTL; it can still be revalidated with its validators
+    fresh: bool = True
+    etag: str | None = None
+    last_modified: str | None = None
+
+class ResponseCache(ABC):
+    """
+    Interface for caches of raw page bodies, keyed by source and normalized word.
+    In offline mode a Fetcher never goes to the network and treats a miss as not found.
+    """
+    offline: bool = False
+
+    @abstractmethod
+    def get(self, source: str, word: str) -> bytes | None:
+        '''Returns the fresh cached body, or None'''
+
+    @abstractmethod
+    def set(self, source: str, word: str, body: bytes, etag: str | None = None,
+            last_modified: str | None = None) -> None:
+        '''Stores a body with the validators it was served with'''
+
+    def lookup(self, source: str, word: str) -> CachedResponse | None:
+        '''Returns the cached response with its validators, including stale ones when the cache keeps them'''
+        body = self.get(source, word)
+        return CachedResponse(body) if body is not None else None
+
+    def peek(self, source: str, word: str) -> CachedResponse | None:
+        '''Like lookup(), for caches that can check an entry without counting it as used'''
+        return self.lookup(source, word)
+
+class DiskCache(ResponseCache):
+    """zlib-compressed page bodies on disk, with a TTL and size-based LRU eviction."""
+
+    def __init__(self, path: str, ttl: float = 30 * 24 * 3600, max_bytes: int = 512 * 1024 * 1024,
+                 offline: bool = False):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._size = sum(size for _, _, size in self._scan())
+
+    def _file(self, source: str, word: str) -> str:
+        '''Returns the file path for a cache key, fanned out over 256 subdirectories'''
+        digest = hashlib.sha1(f"{source}\0{normalize_word(word, source)}".encode()).hexdigest()
+        return os.path.join(self.path, digest[:2], digest[2:])
+
+    def _scan(self) -> list[tuple[float, str, int]]:
+        '''Lists (last used, path, size) for every cached file'''
+        entries = []
+        for dirpath, _, filenames in os.walk(self.path):
+            for name in filenames:
+                file = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(file)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, file, stat.st_size))
+        return entries
+
+    def _read(self, file: str) -> CachedResponse | None:
+        '''Decodes a cache file, or returns None if it is missing or unreadable'''
+        try:
+            with open(file, "rb") as f:
+                raw = f.read()
+            magic, stored_at, etag_len, modified_len = _HEADER.unpack_from(raw)
+            if magic != _MAGIC:
+                raise struct.error("old cache format")
+            etag_end = _HEADER.size + etag_len
+            validators_end = etag_end + modified_len
+            etag = raw[_HEADER.size:etag_end].decode() or None
+            last_modified = raw[etag_end:validators_end].decode() or None
+            body = zlib.decompress(raw[validators_end:])
+        except (FileNotFoundError, struct.error, zlib.error, UnicodeDecodeError):
+            return None
+        return CachedResponse(body, time.time() - stored_at <= self.ttl, etag, last_modified)
+
+    def lookup(self, source: str, word: str) -> CachedResponse | None:
+        file = self._file(source, word)
+        cached = self._read(file)
+        if cached is not None:
+            # The file's mtime records when it was last used, for LRU eviction
+            os.utime(file)
+        with self._lock:
+            if cached is not None and cached.fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return cached
+
+    def peek(self, source: str, word: str) -> CachedResponse | None:
+        '''Reads an entry without counting a hit or miss or marking it as recently used'''
+        return self._read(self._file(source, word))
+
+    def get(self, source: str, word: str) -> bytes | None:
+        cached = self.lookup(source, word)
+        return cached.body if cached is not None and cached.fresh else None
+
+    def set(self, source: str, word: str, body: bytes, etag: str | None = None,
+            last_modified: str | None = None) -> None:
+        file = self._file(source, word)
+        etag_raw = (etag or "").encode()
+        modified_raw = (last_modified or "").encode()
+        raw = (_HEADER.pack(_MAGIC, time.time(), len(etag_raw), len(modified_raw))
+               + etag_raw + modified_raw + zlib.compress(body))
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        try:
+            old_size = os.path.getsize(file)
+        except FileNotFoundError:
+            old_size = 0
+        # Write to a temporary file first so readers never see a partial entry
+        tmp = f"{file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(raw)
+        os.replace(tmp, file)
+        with self._lock:
+            self._size += len(raw) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        '''Deletes least recently used files until the cache is under 90% of max_bytes'''
+        target = self.max_bytes * 0.9
+        entries = sorted(self._scan())
+        self._size = sum(size for _, _, size in entries)
+        for _, file, size in entries:
+            if self._size <= target:
+                break
+            try:
+                os.remove(file)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+
+    def clear(self) -> None:
+        '''Removes every cached response'''
+        with self._lock:
+            for _, file, _ in self._scan():
+                os.remove(file)
+            self._size = 0
+
+    def stats(self) -> dict:
+        '''Returns hit/miss counters and the current size on disk'''
+        return {"hits": self.hits, "misses": self.misses, "bytes": self._size}
@@ -0,0 +1,135 @@
+"""
+Looks up a word list and streams each to_dict() result to a JSONL file as soon as it is ready.
+
+Progress is checkpointed next to the output, so an interrupted run started again with the
+same arguments picks up after the last checkpointed word instead of starting over.
+
+Usage: python -m main.cli words.txt out.jsonl --source wiktionnaire
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+from collections.abc import Iterator
+from itertools import islice
+from typing import TextIO
+
+from .cache import DiskCache
+from .fetch import Fetcher
+from .lib import SOURCES
+from .parsing import BACKENDS, DEFAULT_BACKEND
+from .pipeline import Pipeline
+from .scheduler import BULK, default_scheduler
+
+def read_words(f: TextIO) -> Iterator[str]:
+    '''Streams the non-empty lines of a word list'''
+    for line in f:
+        word = line.strip()
+        if word:
+            yield word
+
+def load_checkpoint(path: str) -> dict | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def save_checkpoint(path: str, checkpoint: dict) -> None:
+    '''Writes the checkpoint atomically, so a crash mid-write leaves the previous one'''
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def _commit(out, checkpoint_path: str, checkpoint: dict, progress: dict) -> None:
+    '''Flushes the output to disk, then records progress up to the last finished word'''
+    out.flush()
+    os.fsync(out.fileno())
+    checkpoint.update(progress)
+    save_checkpoint(checkpoint_path, checkpoint)
+
+def run(words: Iterator[str], output: str, checkpoint_path: str, pipeline: Pipeline, every: int = 100,
+        log: TextIO = sys.stderr) -> dict:
+    """
+    Looks up words with the pipeline, appending a JSON line per defined word to output.
+    Every `every` words the output is flushed to disk and the checkpoint records how many
+    input words are done and how long the output was at that point. A new run appends to an
+    existing output. On resume the output is cut back to the checkpointed length (dropping
+    lines written after the checkpoint) and that many words are skipped, so no word is
+    written twice.
+    """
+    settings = json.loads(json.dumps({"source": pipeline.source, "fields": pipeline.fields}))
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint is None:
+        # A new run appends to whatever the output already holds
+        size = os.path.getsize(output) if os.path.exists(output) else 0
+        checkpoint = {**settings, "words": 0, "bytes": size, "written": 0, "errors": 0}
+    elif (previous := {key: checkpoint[key] for key in settings}) != settings:
+        raise SystemExit(f"{checkpoint_path} was written with different settings: {previous}")
+    elif (size := os.path.getsize(output) if os.path.exists(output) else 0) < checkpoint["bytes"]:
+        # Resuming would pad the output with NULs and skip the words whose results are gone
+        raise SystemExit(f"{output} is shorter than {checkpoint_path} records ({size} < {checkpoint['bytes']} bytes); "
+                         f"restore it or delete the checkpoint to start over")
+    elif checkpoint["words"]:
+        print(f"Resuming after {checkpoint['words']} words", file=log)
+
+    mode = "r+b" if os.path.exists(output) else "wb"
+    with open(output, mode) as out:
+        out.truncate(checkpoint["bytes"])
+        out.seek(checkpoint["bytes"])
+        words_done, written, errors = checkpoint["words"], checkpoint["written"], checkpoint["errors"]
+        progress = {}
+        try:
+            for result in pipeline.run(islice(words, words_done, None)):
+                if result.error is not None:
+                    errors += 1
+                    print(f"{result.word}: {result.error}", file=log)
+                else:
+                    out.write(json.dumps(result.data, ensure_ascii=False).encode() + b"\n")
+                    written += 1
+                words_done += 1
+                # Updated in one step, so an interruption mid-word leaves the previous word's position
+                progress = {"words": words_done, "bytes": out.tell(), "written": written, "errors": errors}
+                if words_done % every == 0:
+                    _commit(out, checkpoint_path, checkpoint, progress)
+        finally:
+            _commit(out, checkpoint_path, checkpoint, progress)
+    return checkpoint
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("words", help="word list, one word per line ('-' for stdin)")
+    parser.add_argument("output", help="JSONL file to append results to")
+    parser.add_argument("--source", default="wordreference", choices=list(SOURCES))
+    parser.add_argument("--fields", help="comma-separated to_dict() fields to keep (default: all)")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: OUTPUT.checkpoint)")
+    parser.add_argument("--every", type=int, default=100, help="words between checkpoints")
+    parser.add_argument("--cache", help="directory to cache fetched pages in")
+    parser.add_argument("--parser", default=DEFAULT_BACKEND, choices=list(BACKENDS))
+    parser.add_argument("--fetch-workers", type=int, default=8)
+    parser.add_argument("--parse-workers", type=int, help="parse processes (default: one per core)")
+    args = parser.parse_args()
+
+    # Treat a kill like Ctrl-C, so the last results are checkpointed before exiting
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    cache = DiskCache(args.cache) if args.cache else None
+    fetcher = Fetcher(pool_size=args.fetch_workers, cache=cache, scheduler=default_scheduler(), priority=BULK)
+    pipeline = Pipeline(args.source, fetcher,
+                        fetch_workers=args.fetch_workers, parse_workers=args.parse_workers,
+                        parser=args.parser, fields=args.fields.split(",") if args.fields else None)
+    words_file = sys.stdin if args.words == "-" else open(args.words, encoding="utf-8")
+    try:
+        checkpoint = run(read_words(words_file), args.output, args.checkpoint or args.output + ".checkpoint",
+                         pipeline, args.every)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    finally:
+        words_file.close()
+    print(f"{checkpoint['words']} words done: {checkpoint['written']} written, {checkpoint['errors']} not found")
+
+if __name__ == "__main__":
+    main()
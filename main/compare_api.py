@@ -0,0 +1,84 @@
+"""
+Checks that Wiktionnaire lookups through the MediaWiki parse API (only the Français section)
+give the same to_dict() output as the full saved articles, and reports the bytes each downloads.
+
+The API responses are recorded once from the live site into <pages>/wiktionnaire.api.json,
+then served by a local stand-in, so the comparison runs offline:
+    python -m main.compare_api pages/ --record
+    python -m main.compare_api pages/
+"""
+import argparse
+import json
+import os
+import sys
+from urllib.parse import urlsplit
+
+from .bench import PageServer
+from .compare_parsers import extract, load_pages
+from .errors import DefinitionNotFoundError
+from .fetch import Fetcher
+from .lib import Wiktionnaire
+from .parsing import DEFAULT_BACKEND
+
+SOURCE = Wiktionnaire.SOURCE
+
+def recording_file(path: str) -> str:
+    return os.path.join(path, f"{SOURCE}.api.json")
+
+def record(words: list[str]) -> dict[str, str]:
+    '''Looks the words up on the live API, returning every response body keyed by its query string'''
+    responses = {}
+    fetcher = Fetcher()
+    fetcher.session.hooks["response"].append(
+        lambda response, *args, **kwargs: responses.__setitem__(urlsplit(response.url).query, response.text))
+    for word in words:
+        try:
+            fetcher.fetch_section(SOURCE, word, Wiktionnaire.HEADING)
+        except DefinitionNotFoundError:
+            pass
+    return responses
+
+def extract_api(word: str, fetcher: Fetcher) -> dict | str:
+    '''Runs the full extraction over the API, returning the error message instead when there is no definition'''
+    try:
+        return Wiktionnaire(word, fetcher=fetcher, api=True).to_dict()
+    except DefinitionNotFoundError as e:
+        return f"DefinitionNotFoundError: {e}"
+
+def compare(pages: list[tuple[str, bytes]], responses: dict[str, str]) -> bool:
+    '''Prints the comparison report and returns whether every word matched its full page'''
+    ok = True
+    api = {SOURCE: {query: body.encode() for query, body in responses.items()}}
+    with PageServer({}, api) as server:
+        fetcher = Fetcher(api_urls=server.api_urls)
+        for word, html in pages:
+            if extract_api(word, fetcher) != extract(SOURCE, word, html, DEFAULT_BACKEND):
+                print(f"MISMATCH {SOURCE}/{word}")
+                ok = False
+    page_bytes = sum(len(html) for _, html in pages)
+    api_bytes = fetcher.stats()["bytes_downloaded"]
+    print(f"{len(pages)} words: full pages {page_bytes / 1024:.1f} KiB, "
+          f"API {api_bytes / 1024:.1f} KiB ({1 - api_bytes / page_bytes:.0%} less)")
+    return ok
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pages", help="directory of saved pages, one subdirectory per source")
+    parser.add_argument("--record", action="store_true",
+                        help="record the live API responses for the saved words instead of comparing")
+    args = parser.parse_args()
+
+    pages = [(word, html) for source, word, html in load_pages(args.pages) if source == SOURCE]
+    if not pages:
+        sys.exit(f"No saved {SOURCE} pages found in {args.pages}")
+    if args.record:
+        with open(recording_file(args.pages), "w", encoding="utf-8") as f:
+            json.dump(record([word for word, _ in pages]), f, ensure_ascii=False, indent=1)
+        return
+    with open(recording_file(args.pages), encoding="utf-8") as f:
+        responses = json.load(f)
+    if not compare(pages, responses):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Checks that every parser backend gives the same to_dict() output on a saved page set,
+and reports parse time and peak parse memory per backend.
+
+The page set is a directory holding one subdirectory per source, e.g.
+    pages/wordreference/pomme.html
+    pages/wiktionnaire/pendule.html
+
+Usage: python -m main.compare_parsers pages/
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+from .errors import DefinitionNotFoundError
+from .lib import SOURCES
+from .parsing import BACKENDS, DEFAULT_BACKEND, backend_available, make_soup
+
+def load_pages(path: str) -> list[tuple[str, str, bytes]]:
+    '''Reads every saved page as (source, word, html)'''
+    pages = []
+    for source in sorted(os.listdir(path)):
+        if source not in SOURCES:
+            continue
+        source_dir = os.path.join(path, source)
+        for name in sorted(os.listdir(source_dir)):
+            word, ext = os.path.splitext(name)
+            if ext == ".html":
+                with open(os.path.join(source_dir, name), "rb") as f:
+                    pages.append((source, word, f.read()))
+    return pages
+
+def extract(source: str, word: str, html: bytes, backend: str) -> dict | str:
+    '''Runs the full extraction, returning the error message instead when there is no definition'''
+    try:
+        return SOURCES[source](word, html=html, parser=backend).to_dict()
+    except DefinitionNotFoundError as e:
+        return f"DefinitionNotFoundError: {e}"
+
+def measure(source: str, word: str, html: bytes, backend: str) -> tuple[float, int]:
+    '''Returns the parse time in seconds and the peak memory in bytes of one page'''
+    sections = SOURCES[source].SECTIONS
+    start = time.perf_counter()
+    make_soup(html, backend, sections)
+    elapsed = time.perf_counter() - start
+    # Measured in a second run, as tracing allocations slows parsing down
+    tracemalloc.start()
+    make_soup(html, backend, sections)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def compare(pages: list[tuple[str, str, bytes]], backends: list[str]) -> bool:
+    '''Prints the comparison report and returns whether every backend matched the default'''
+    ok = True
+    for source, word, html in pages:
+        expected = extract(source, word, html, DEFAULT_BACKEND)
+        for backend in backends:
+            if extract(source, word, html, backend) != expected:
+                print(f"MISMATCH {source}/{word} with {backend}")
+                ok = False
+
+    baseline_time = baseline_mem = None
+    print(f"{'backend':<22}{'parse ms/page':>15}{'peak KiB/page':>15}{'time':>9}{'memory':>9}")
+    for backend in backends:
+        times, peaks = zip(*(measure(source, word, html, backend) for source, word, html in pages))
+        avg_time = sum(times) / len(times)
+        avg_mem = sum(peaks) / len(peaks)
+        if baseline_time is None:
+            baseline_time, baseline_mem = avg_time, avg_mem
+        print(f"{backend:<22}{avg_time * 1000:>15.2f}{avg_mem / 1024:>15.1f}"
+              f"{1 - avg_time / baseline_time:>9.0%}{1 - avg_mem / baseline_mem:>9.0%}")
+    return ok
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pages", help="directory of saved pages, one subdirectory per source")
+    parser.add_argument("--backend", action="append", choices=list(BACKENDS),
+                        help="backend to compare (default: all installed); reductions are relative to the first")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages)
+    if not pages:
+        sys.exit(f"No saved pages found in {args.pages}")
+    backends = []
+    for backend in args.backend or list(BACKENDS):
+        if backend_available(backend):
+            backends.append(backend)
+        else:
+            print(f"Skipping {backend}: its tree builder is not installed", file=sys.stderr)
+    if DEFAULT_BACKEND in backends:
+        backends.remove(DEFAULT_BACKEND)
+    backends.insert(0, DEFAULT_BACKEND)
+    if not compare(pages, backends):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
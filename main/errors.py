@@ -0,0 +1,3 @@
+class DefinitionNotFoundError(Exception):
+    """Raised when no definition can be found for the target word."""
+    pass
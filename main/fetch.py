@@ -0,0 +1,263 @@
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cache import ResponseCache, normalize_word
+from .errors import DefinitionNotFoundError
+from .parsing import SectionMatcher, StopRule, stream_sections
+from .scheduler import INTERACTIVE, Scheduler, default_scheduler
+
+# URL templates for each dictionary source, keyed by source name
+URLS = {
+    "wordreference": "https://www.wordreference.com/fren/{word}",
+    "wiktionnaire": "https://fr.wiktionary.org/wiki/{word}",
+}
+
+# MediaWiki API endpoints of the sources that can be fetched one section at a time (see fetch_section)
+API_URLS = {
+    "wiktionnaire": "https://fr.wiktionary.org/w/api.php",
+}
+
+def parse_query(word: str, prop: str, section: int | None = None) -> str:
+    '''Query string of an action=parse API call; recorded API responses are keyed by it'''
+    params = {"action": "parse", "format": "json", "formatversion": "2", "redirects": "1",
+              "page": word, "prop": prop}
+    if section is not None:
+        params["section"] = str(section)
+    return urlencode(params)
+
+# Seconds to wait for a connection or for the server to send data, so a hung request can't block forever
+DEFAULT_TIMEOUT = 10.0
+
+# Statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+@dataclass
+class FetchResult:
+    # body is None only for a 304 to validators the caller supplied without a cached body
+    body: bytes | None
+    # not_modified is True when the page is unchanged since the caller's (or the cache's) validators
+    not_modified: bool = False
+    etag: str | None = None
+    last_modified: str | None = None
+    from_cache: bool = False
+
+class Fetcher:
+    """
+    Downloads dictionary pages over a shared keep-alive connection pool.
+    Stale cached pages are revalidated with If-None-Match/If-Modified-Since, so an unchanged
+    page costs a 304 with no body. Connection errors and RETRY_STATUSES are retried up to
+    `retries` times with jittered exponential backoff (honouring Retry-After). A 404 raises
+    DefinitionNotFoundError and other error statuses raise HTTPError, so only pages reach parsers.
+    With a Scheduler, every request waits for its host's rate limit in the fetcher's priority
+    lane, and identical fetches in flight at the same time are made once.
+    """
+
+    def __init__(self, pool_size: int = 10, urls: dict[str, str] | None = None,
+                 timeout: float | None = DEFAULT_TIMEOUT, cache: ResponseCache | None = None, retries: int = 3,
+                 backoff: float = 0.5, backoff_max: float = 30.0, scheduler: Scheduler | None = None, priority: int = INTERACTIVE,
+                 api_urls: dict[str, str] | None = None):
+        self.urls = {**URLS, **(urls or {})}
+        self.api_urls = {**API_URLS, **(api_urls or {})}
+        self.timeout = timeout
+        self.cache = cache
+        self.scheduler = scheduler
+        # priority is the scheduler lane of this fetcher's requests (scheduler.INTERACTIVE or BULK)
+        self.priority = priority
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        # One pool per host, each holding up to pool_size idle connections
+        adapter = HTTPAdapter(pool_connections=len(self.urls), pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Network counters; bytes_saved is the size of the bodies that 304s didn't resend
+        self.counters = {"requests": 0, "retries": 0, "not_modified": 0, "bytes_downloaded": 0, "bytes_saved": 0}
+        self._lock = threading.Lock()
+
+    def url(self, source: str, word: str) -> str:
+        '''Builds the page url for a word on the given source'''
+        return self.urls[source].format(word=word)
+
+    def _count(self, **amounts: int) -> None:
+        with self._lock:
+            for name, amount in amounts.items():
+                self.counters[name] += amount
+
+    def _delay(self, attempt: int, response: requests.Response | None) -> float:
+        '''Seconds to wait before retry number attempt (0-based): Retry-After if given, else full-jitter backoff'''
+        retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+        if retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+
+    def _get(self, url: str, headers: dict[str, str], stream: bool = False) -> requests.Response:
+        '''GETs url, retrying connection errors and RETRY_STATUSES'''
+        for attempt in range(self.retries + 1):
+            response = None
+            if self.scheduler is not None:
+                self.scheduler.acquire(urlsplit(url).hostname, self.priority)
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+            self._count(requests=1)
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                if response.status_code == 404:
+                    response.close()
+                    raise DefinitionNotFoundError(f"No page at {url}")
+                # Error pages never reach the parsers
+                response.raise_for_status()
+                return response
+            if attempt == self.retries:
+                response.raise_for_status()
+            if response is not None:
+                response.close()
+            self._count(retries=1)
+            time.sleep(self._delay(attempt, response))
+        raise AssertionError("unreachable")
+
+    def fetch_result(self, source: str, word: str, etag: str | None = None,
+                     last_modified: str | None = None) -> FetchResult:
+        """
+        Fetches a page, revalidating against etag/last_modified when given (e.g. ones stored
+        with an extracted entry) or else against the cached copy's validators.
+        not_modified tells the caller its own copy is still current.
+        """
+        if self.scheduler is None:
+            return self._fetch_result(source, word, etag, last_modified)
+        key = (self.url(source, normalize_word(word, source)), etag, last_modified)
+        return self.scheduler.run(key, self.priority, lambda: self._fetch_result(source, word, etag, last_modified))
+
+    def _fetch_result(self, source: str, word: str, etag: str | None, last_modified: str | None) -> FetchResult:
+        cached = self.cache.lookup(source, word) if self.cache is not None else None
+        caller_validators = etag is not None or last_modified is not None
+        if cached is not None and cached.fresh:
+            unchanged = caller_validators and (etag, last_modified) == (cached.etag, cached.last_modified)
+            return FetchResult(cached.body, unchanged, cached.etag, cached.last_modified, from_cache=True)
+        if self.cache is not None and self.cache.offline:
+            raise DefinitionNotFoundError(f"{word!r} is not cached for {source} (offline)")
+
+        if not caller_validators and cached is not None:
+            etag, last_modified = cached.etag, cached.last_modified
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        response = self._get(self.url(source, word), headers)
+
+        if response.status_code == 304:
+            # The cached body is only the current page if it is the copy the sent validators describe
+            current = cached is not None and (cached.etag, cached.last_modified) == (etag, last_modified)
+            body = cached.body if current else None
+            etag = response.headers.get("ETag", etag)
+            last_modified = response.headers.get("Last-Modified", last_modified)
+            self._count(not_modified=1, bytes_saved=len(body) if body is not None else 0)
+            if self.cache is not None and body is not None:
+                # Restart the TTL of the revalidated copy
+                self.cache.set(source, word, body, etag, last_modified)
+            return FetchResult(body, True, etag, last_modified, from_cache=body is not None)
+
+        body = response.content
+        self._count(bytes_downloaded=len(body))
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if self.cache is not None:
+            self.cache.set(source, word, body, etag, last_modified)
+        return FetchResult(body, False, etag, last_modified)
+
+    def fetch(self, source: str, word: str) -> bytes:
+        '''Fetches the raw page for a word (from the cache when possible) and returns its bytes'''
+        return self.fetch_result(source, word).body
+
+    def fetch_sections(self, source: str, word: str, sections: SectionMatcher, stop: StopRule | None = None,
+                       chunk_size: int = 16 * 1024) -> str:
+        """
+        Streams a page through a SectionStream and returns only the sections accepted by
+        `sections`. The connection is closed as soon as `stop` says the rest of the page isn't
+        needed, so the tail of the page is neither downloaded nor parsed.
+        Partial pages aren't cached, but a cached page is used when there is one.
+        """
+        if self.cache is not None:
+            body = self.cache.get(source, word)
+            if body is not None:
+                return stream_sections([body], sections, stop)
+            if self.cache.offline:
+                raise DefinitionNotFoundError(f"{word!r} is not cached for {source} (offline)")
+        response = self._get(self.url(source, word), {}, stream=True)
+        try:
+            html = stream_sections(response.iter_content(chunk_size), sections, stop)
+            # Bytes off the wire, before any content decoding
+            read = response.raw.tell()
+        finally:
+            response.close()
+        length = response.headers.get("Content-Length", "")
+        self._count(bytes_downloaded=read, bytes_saved=max(int(length) - read, 0) if length.isdigit() else 0)
+        return html
+
+    def _parse(self, source: str, word: str, prop: str, section: int | None = None) -> dict:
+        '''Calls action=parse on the source's MediaWiki API and returns its "parse" result'''
+        response = self._get(f"{self.api_urls[source]}?{parse_query(word, prop, section)}", {})
+        self._count(bytes_downloaded=len(response.content))
+        data = json.loads(response.content)
+        if "error" in data:
+            # missingtitle for a word without a page, nosuchsection for a page without sections
+            raise DefinitionNotFoundError(data["error"].get("info", "Definition does not exist"))
+        return data["parse"]
+
+    def fetch_section(self, source: str, word: str, heading: str) -> bytes:
+        """
+        Fetches the rendered HTML of only the top-level section titled `heading` (e.g. the
+        Français section of a Wiktionnaire article) through the source's MediaWiki parse API.
+        Section 1 is asked for first, as the heading is usually the first one; otherwise the
+        table of contents is fetched to find its index. Sections are cached apart from full pages.
+        """
+        if self.scheduler is None:
+            return self._fetch_section(source, word, heading)
+        key = (self.api_urls[source], normalize_word(word, source), heading)
+        return self.scheduler.run(key, self.priority, lambda: self._fetch_section(source, word, heading))
+
+    def _fetch_section(self, source: str, word: str, heading: str) -> bytes:
+        key = f"{source}#{heading}"
+        if self.cache is not None:
+            body = self.cache.get(key, word)
+            if body is not None:
+                return body
+            if self.cache.offline:
+                raise DefinitionNotFoundError(f"{word!r} is not cached for {source} (offline)")
+        parsed = self._parse(source, word, "text|sections", section=1)
+        sections = parsed.get("sections") or [{}]
+        # "line" is the heading's TOC HTML (e.g. <span>Français</span>); its anchor is the plain id
+        anchor = heading.replace(" ", "_")
+        if sections[0].get("anchor") != anchor:
+            toc = self._parse(source, word, "sections")["sections"]
+            index = next((s["index"] for s in toc if s["toclevel"] == 1 and s.get("anchor") == anchor), None)
+            if index is None:
+                raise DefinitionNotFoundError(f"{word!r} has no {heading} section on {source}")
+            parsed = self._parse(source, word, "text", section=int(index))
+        body = parsed["text"].encode()
+        if self.cache is not None:
+            self.cache.set(key, word, body)
+        return body
+
+    def stats(self) -> dict:
+        '''Returns the network counters'''
+        with self._lock:
+            return dict(self.counters)
+
+_default_fetcher: Fetcher | None = None
+
+def default_fetcher() -> Fetcher:
+    """Returns the process-wide Fetcher, creating it on first use."""
+    global _default_fetcher
+    if _default_fetcher is None:
+        _default_fetcher = Fetcher(scheduler=default_scheduler())
+    return _default_fetcher
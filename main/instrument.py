@@ -0,0 +1,190 @@
+import cProfile
+import functools
+import heapq
+import itertools
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Callable
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+# Histogram bucket upper bounds in seconds: 0.1ms doubling up to ~52s
+_BUCKETS = [0.0001 * 2 ** i for i in range(20)]
+
+class Histogram:
+    """Log-bucketed latency histogram."""
+
+    def __init__(self):
+        self.counts = [0] * (len(_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.counts[bisect_left(_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, pct: float) -> float:
+        '''Upper bound of the bucket holding the given percentile'''
+        rank = pct / 100 * self.count
+        seen = 0
+        for idx, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return min(_BUCKETS[idx], self.max) if idx < len(_BUCKETS) else self.max
+        return 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+@dataclass
+class WordTiming:
+    # Seconds spent in each stage while looking up one word, excluding time in nested stages
+    source: str
+    word: str
+    stages: dict[str, float] = field(default_factory=dict)
+    total: float = 0.0
+    # Time spent in nested stages, one slot per stage currently running
+    _nested: list[float] = field(default_factory=list, repr=False)
+
+    @property
+    def slowest_stage(self) -> str:
+        return max(self.stages, key=self.stages.get)
+
+# The word being timed on the current thread/task, set by its outermost stage
+_current_word: ContextVar[WordTiming | None] = ContextVar("current_word", default=None)
+_active: "Instrumentation | None" = None
+
+class Instrumentation:
+    """
+    Collects per-stage timings of WordReference/Wiktionnaire lookups while active
+    (fetch, parse, row/word-group extraction, every get_* and to_dict/extract call):
+    a histogram per (source, stage), a log of words slower than slow_threshold with their
+    slowest stage, optional per-stage callbacks, and, with profile_top set, cProfile
+    stats for the slowest profile_top words.
+
+        with Instrumentation(slow_threshold=1.0) as inst:
+            ...lookups...
+        print(inst.report())
+    """
+
+    def __init__(self, slow_threshold: float = 1.0, slow_log_size: int = 1000, profile_top: int = 0,
+                 callbacks: list[Callable[[str, str, str, float], None]] | None = None):
+        self.slow_threshold = slow_threshold
+        self.slow_log: deque[WordTiming] = deque(maxlen=slow_log_size)
+        self.profile_top = profile_top
+        # callbacks are called as callback(source, word, stage, seconds) after every stage
+        self.callbacks = list(callbacks or [])
+        self.histograms: dict[tuple[str, str], Histogram] = {}
+        # Min-heap of (seconds, tiebreak, source, word, profile) for the slowest words
+        self._profiles: list[tuple[float, int, str, str, cProfile.Profile]] = []
+        self._tiebreak = itertools.count()
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "Instrumentation":
+        global _active
+        self._previous = _active
+        _active = self
+        return self
+
+    def __exit__(self, *exc) -> None:
+        global _active
+        _active = self._previous
+
+    @contextmanager
+    def stage(self, source: str, word: str, stage: str):
+        '''Times one stage of a lookup; the outermost stage on a thread times the whole word'''
+        timing = _current_word.get()
+        outermost = timing is None
+        profile = None
+        if outermost:
+            timing = WordTiming(source, word)
+            token = _current_word.set(timing)
+            if self.profile_top:
+                profile = cProfile.Profile()
+                try:
+                    profile.enable()
+                except ValueError:
+                    # Another profiler is already running on this thread
+                    profile = None
+        timing._nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            nested = timing._nested.pop()
+            if timing._nested:
+                timing._nested[-1] += seconds
+            timing.stages[stage] = timing.stages.get(stage, 0.0) + seconds - nested
+            with self._lock:
+                self.histograms.setdefault((source, stage), Histogram()).add(seconds)
+            for callback in self.callbacks:
+                callback(source, word, stage, seconds)
+            if outermost:
+                if profile is not None:
+                    profile.disable()
+                _current_word.reset(token)
+                timing.total = seconds
+                self._finish(timing, profile)
+
+    def _finish(self, timing: WordTiming, profile: cProfile.Profile | None) -> None:
+        with self._lock:
+            if timing.total >= self.slow_threshold:
+                self.slow_log.append(timing)
+            if profile is not None:
+                item = (timing.total, next(self._tiebreak), timing.source, timing.word, profile)
+                if len(self._profiles) < self.profile_top:
+                    heapq.heappush(self._profiles, item)
+                elif timing.total > self._profiles[0][0]:
+                    heapq.heapreplace(self._profiles, item)
+
+    def dump_profiles(self, directory: str) -> list[str]:
+        '''Writes the cProfile stats of the slowest words as <source>-<word>.prof files'''
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for seconds, _, source, word, profile in sorted(self._profiles, reverse=True):
+            safe_word = re.sub(r"[^\w.-]", "_", word)
+            path = os.path.join(directory, f"{source}-{safe_word}.prof")
+            profile.dump_stats(path)
+            paths.append(path)
+        return paths
+
+    def report(self) -> str:
+        '''Formats the histograms and the slow-word log'''
+        lines = [f"{'source':<15}{'stage':<22}{'count':>7}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for (source, stage), hist in sorted(self.histograms.items()):
+            lines.append(f"{source:<15}{stage:<22}{hist.count:>7}{hist.mean * 1000:>10.2f}"
+                         f"{hist.percentile(50) * 1000:>10.2f}{hist.percentile(99) * 1000:>10.2f}{hist.max * 1000:>10.2f}")
+        if self.slow_log:
+            lines.append(f"Words slower than {self.slow_threshold}s:")
+            for timing in self.slow_log:
+                lines.append(f"  {timing.source} {timing.word!r}: {timing.total * 1000:.1f} ms, "
+                             f"slowest stage {timing.slowest_stage} ({timing.stages[timing.slowest_stage] * 1000:.1f} ms)")
+        return "\n".join(lines)
+
+def stage(entry, name: str):
+    '''Times a stage of an entry's lookup if instrumentation is active'''
+    if _active is None:
+        return nullcontext()
+    return _active.stage(entry.SOURCE, entry.target_word, name)
+
+def timed(name: str):
+    '''Decorates an entry method so each call is timed as stage `name`'''
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if _active is None:
+                return method(self, *args, **kwargs)
+            with _active.stage(self.SOURCE, self.target_word, name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,152 @@
+import json
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from dataclasses import dataclass
+
+from .cache import normalize_word
+
+# Index file layout: magic, record count, one uint32 offset per record, then the records.
+# Records are "form\tlemma\tdescriptions\n" in UTF-8, sorted by form then lemma.
+_MAGIC = b"AVLEMMA1"
+_COUNT = struct.Struct("<I")
+
+@dataclass(frozen=True)
+class Inflection:
+    # form is the inflected word, lemma its infinitive/dictionary form
+    form: str
+    lemma: str
+    # description is WordReference's tense/person text, e.g. "avoir : 1ère personne du singulier..."
+    description: str
+
+class _Records:
+    """Sorted records of an index file, read through mmap without loading them into memory."""
+
+    def __init__(self, path: str):
+        self.count = 0
+        self._map = None
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"{path} is not a lemma index")
+        (self.count,) = _COUNT.unpack_from(self._map, len(_MAGIC))
+        self._offsets = len(_MAGIC) + _COUNT.size
+        self._data = self._offsets + 4 * self.count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _record(self, idx: int) -> bytes:
+        (offset,) = _COUNT.unpack_from(self._map, self._offsets + 4 * idx)
+        start = self._data + offset
+        return self._map[start:self._map.find(b"\n", start)]
+
+    def __getitem__(self, idx: int) -> bytes:
+        '''The form of record idx, which is what the records are sorted by (for bisect)'''
+        return self._record(idx).split(b"\t", 1)[0]
+
+    def find(self, form: str) -> list[Inflection]:
+        key = form.encode()
+        idx = bisect_left(self, key)
+        found = []
+        while idx < self.count:
+            record_form, lemma, description = self._record(idx).decode().split("\t")
+            if record_form != form:
+                break
+            found.append(Inflection(record_form, lemma, description))
+            idx += 1
+        return found
+
+    def __iter__(self):
+        for idx in range(self.count):
+            yield Inflection(*self._record(idx).decode().split("\t"))
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+
+class LemmaIndex:
+    """
+    Maps inflected forms (e.g. "eusse") to their lemma ("avoir") and tense/person descriptions.
+    The bulk of the index is a sorted, memory-mapped file; new forms are appended to a small
+    log next to it and merged into the file by compact().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.log_path = path + ".log"
+        self._records = _Records(path)
+        # form -> {lemma: description} added since the last compaction
+        self._pending: dict[str, dict[str, str]] = {}
+        if os.path.exists(self.log_path):
+            with open(self.log_path, encoding="utf-8") as f:
+                for line in f:
+                    form, lemma, description = json.loads(line)
+                    self._pending.setdefault(form, {})[lemma] = description
+        self._log = open(self.log_path, "a", encoding="utf-8")
+
+    def __len__(self) -> int:
+        return len(self._records) + sum(len(lemmas) for lemmas in self._pending.values())
+
+    def lookup(self, word: str) -> list[Inflection]:
+        '''Returns every known reading of an inflected form'''
+        form = normalize_word(word)
+        found = {inflection.lemma: inflection for inflection in self._records.find(form)}
+        for lemma, description in self._pending.get(form, {}).items():
+            found[lemma] = Inflection(form, lemma, description)
+        return list(found.values())
+
+    def resolve(self, word: str) -> str:
+        '''Returns the lemma of an inflected form, or the word itself if it is unknown or ambiguous'''
+        lemmas = {inflection.lemma for inflection in self.lookup(word)}
+        return lemmas.pop() if len(lemmas) == 1 else word
+
+    def add(self, word: str, lemma: str, descriptions: list[str]) -> None:
+        '''Records that word is an inflection of lemma'''
+        form = normalize_word(word)
+        lemma = normalize_word(lemma)
+        if form == lemma:
+            return
+        description = "; ".join(d.replace("\t", " ").replace("\n", " ") for d in descriptions)
+        if self._pending.get(form, {}).get(lemma) == description:
+            return
+        self._pending.setdefault(form, {})[lemma] = description
+        self._log.write(json.dumps([form, lemma, description], ensure_ascii=False) + "\n")
+        self._log.flush()
+
+    def add_inflections(self, word: str, inflections: dict[str, list[str]]) -> None:
+        '''Records the output of WordReference.get_inflections() for word'''
+        for lemma, descriptions in inflections.items():
+            self.add(word, lemma, descriptions)
+
+    def compact(self) -> None:
+        '''Merges the log into a new sorted index file'''
+        merged: dict[tuple[str, str], str] = {(i.form, i.lemma): i.description for i in self._records}
+        for form, lemmas in self._pending.items():
+            for lemma, description in lemmas.items():
+                merged[(form, lemma)] = description
+        keys = sorted(merged, key=lambda key: (key[0].encode(), key[1].encode()))
+
+        offsets, data = [], bytearray()
+        for form, lemma in keys:
+            offsets.append(len(data))
+            data += f"{form}\t{lemma}\t{merged[(form, lemma)]}\n".encode()
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_MAGIC)
+            f.write(_COUNT.pack(len(keys)))
+            f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+            f.write(data)
+        self._records.close()
+        os.replace(tmp, self.path)
+        self._records = _Records(self.path)
+        self._pending.clear()
+        self._log.close()
+        self._log = open(self.log_path, "w", encoding="utf-8")
+
+    def close(self) -> None:
+        self._log.close()
+        self._records.close()
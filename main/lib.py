@@ -1,32 +1,263 @@
 import ast
-import requests
+from collections.abc import Iterable
 from bs4 import BeautifulSoup
 from bs4.element import Tag, NavigableString
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from itertools import chain
 import pprint
 import json
 
-class DefinitionNotFoundError(Exception):
-    """Raised when no definition can be found for the target word."""
-    pass
+from .errors import DefinitionNotFoundError
+from .fetch import Fetcher, default_fetcher
+from .instrument import stage, timed
+from .parsing import DEFAULT_BACKEND, StopRule, class_list, make_soup, stream_sections
+from .wikidump import DumpIndex
+
+def _wr_sections(name: str, attrs: dict) -> bool:
+    '''Matches the parts of a WordReference page that WordReference reads'''
+    if name == "table":
+        return "WRD" in class_list(attrs)
+    if name == "div":
+        classes = class_list(attrs)
+        return attrs.get("id") == "articleHead" or "inflectionsSection" in classes or "otherWRD" in classes
+    return False
+
+def _wiktionnaire_sections(name: str, attrs: dict) -> bool:
+    '''Matches the article body of a Wiktionnaire page'''
+    return name == "div" and "mw-parser-output" in class_list(attrs)
+
+def _wr_stream_stop() -> StopRule:
+    '''
+    A WordReference page has nothing more to read once both the article container and the
+    inflections section have closed. Pages without an inflections section are read to the end,
+    as there is no telling that one isn't still to come.
+    '''
+    article_closed = inflections_closed = False
+    def stop(event: str, name: str, attrs: dict) -> bool:
+        nonlocal article_closed, inflections_closed
+        if event == "end" and name == "div":
+            if attrs.get("id") == "articleWRD":
+                article_closed = True
+            elif "inflectionsSection" in class_list(attrs):
+                inflections_closed = True
+        return article_closed and inflections_closed
+    return stop
+
+def _wiktionnaire_stream_stop() -> StopRule:
+    '''A Wiktionnaire page has nothing more to read at the first language heading after Français'''
+    seen_french = False
+    def stop(event: str, name: str, attrs: dict) -> bool:
+        nonlocal seen_french
+        if event != "start" or name != "h2":
+            return False
+        if attrs.get("id") == "Français":
+            seen_french = True
+            return False
+        return seen_french
+    return stop
+
+def _keep_section(article: Tag, heading: str) -> None:
+    """
+    Removes everything but the language section with the given h2 id from a Wiktionnaire
+    article body, so a full page reads the same as a streamed one or one from the parse API.
+    Sections can be flat runs of siblings or nested in <section> tags.
+    """
+    h2 = article.find('h2', id=heading)
+    if h2 is None:
+        return
+    start = h2
+    while start.parent is not article:
+        start = start.parent
+    for sibling in list(start.find_previous_siblings()):
+        sibling.decompose()
+    following = list(start.find_next_siblings())
+    for i, sibling in enumerate(following):
+        if sibling.name == 'h2' or sibling.find('h2') is not None:
+            for rest in following[i:]:
+                rest.decompose()
+            break
+
+class lazy_property:
+    """
+    Computes an attribute on first access and stores it on the instance.
+    Unlike functools.cached_property before Python 3.12, it takes no class-wide lock,
+    which would make lookups of different words on different threads wait for each other.
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.__doc__ = func.__doc__
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = instance.__dict__[self.name] = self.func(instance)
+        return value
+
+def _collect(entry, fields: Iterable[str] | None) -> dict:
+    """
+    Builds the to_dict() output of an entry, calling only the getters of the requested fields
+    (all of entry.FIELDS by default), so unrequested sections are never fetched or parsed.
+    """
+    fields = entry.FIELDS if fields is None else tuple(fields)
+    unknown = set(fields) - set(entry.FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields for {type(entry).__name__}: {sorted(unknown)}")
+    data = {"target_word": entry.target_word}
+    for name in entry.FIELDS:
+        if name in fields:
+            data[name] = getattr(entry, f"get_{name}")()
+    return data
+
+def _release(entry) -> None:
+    """Decomposes an entry's parse tree and drops every cached property built from it."""
+    soup = entry.__dict__.get("soup")
+    for name, attr in vars(type(entry)).items():
+        if isinstance(attr, lazy_property):
+            entry.__dict__.pop(name, None)
+    if soup is not None:
+        soup.decompose()
+
+@dataclass(frozen=True, slots=True)
+class Entry:
+    """Compact, immutable record of an extracted entry that holds no parse tree."""
+    source: str
+    target_word: str
+    definitions: dict | str = ""
+    pronunciations: str | tuple[str, ...] = ""
+    genders: tuple[str, ...] = ()
+    inflections: dict = field(default_factory=dict)
+    examples: tuple[str, ...] | dict = ()
+    audio: tuple[str, ...] = ()
+
+    def to_dict(self) -> dict:
+        '''Returns the same dictionary as the to_dict() of the class that produced the record'''
+        data = {"target_word": self.target_word}
+        for name in SOURCES[self.source].FIELDS:
+            value = getattr(self, name)
+            data[name] = list(value) if isinstance(value, tuple) else value
+        return data
+
+# td titles that mark a WRD table as holding translations rather than "Formes composées"
+_TRANSLATION_TITLES = ("Principal Translations", "Additional Translations")
+
+@dataclass(frozen=True)
+class WRRow:
+    """One even/odd row of a WordReference definition table, reduced to the fields the getters read."""
+    group_id: str
+    # fr_wrd and pos are the French headword and part of speech, if the row starts a definition
+    fr_wrd: str | None
+    pos: str | None
+    # dsense is the sense note in the middle cell, without brackets
+    dsense: str | None
+    # gloss is the English translation, None when the row has none
+    gloss: str | None
+    fr_ex: tuple[str, ...]
+    to_ex: tuple[str, ...]
+
+def _make_row(group_id: str, tds: list[Tag]) -> WRRow:
+    """Reads a WRRow from the <td> cells of a table row."""
+    fr_wrd = pos = None
+    seen_fr_wrd = False
+    fr_ex = []
+    to_ex = []
+    for td in tds:
+        classes = td.get('class', [])
+        if 'FrWrd' in classes and not seen_fr_wrd:
+            # Only the first FrWrd cell counts, and only when it has both parts
+            seen_fr_wrd = True
+            if td.strong and td.em:
+                fr_wrd, pos = td.strong.text.strip(), td.em.text.strip()
+        if 'FrEx' in classes:
+            fr_ex.append(td.get_text())
+        if 'ToEx' in classes:
+            to_ex.append(td.get_text())
+
+    dsense = gloss = None
+    if len(tds) >= 3:
+        dsense_span = tds[1].find("span", class_="dsense")
+        if dsense_span:
+            dsense = dsense_span.get_text(strip=True).strip('()')
+        # first real text node in the English cell
+        for node in tds[2].contents:
+            if isinstance(node, NavigableString) and node.strip():
+                gloss = node.strip()
+                break
+        if gloss and "⇒" in gloss:
+            gloss = gloss.split("⇒", 1)[0].strip()
+    return WRRow(group_id, fr_wrd, pos, dsense, gloss, tuple(fr_ex), tuple(to_ex))
 
 @dataclass
 class WordReference:
     # target_word is the word that we want to define 
     target_word: str
-
-    def __post_init__(self):
-        self.soup = self._get_soup()
-        self.article_head = self._get_article_head()
-        self.tr_dict = self._get_tr_dict()
+    # html is the pre-fetched page; when given, no request is made
+    html: bytes | str | None = field(default=None, repr=False)
+    fetcher: Fetcher | None = field(default=None, repr=False, compare=False)
+    # parser is one of parsing.BACKENDS
+    parser: str = field(default=DEFAULT_BACKEND, repr=False, compare=False)
+    # stream reads only the sections in SECTIONS, stopping the download once STREAM_STOP says they are complete
+    stream: bool = field(default=False, repr=False, compare=False)
+
+    SOURCE = "wordreference"
+    # Page sections read by this class, for subtree-only parser backends
+    SECTIONS = staticmethod(_wr_sections)
+    # Makes the stop rule of a streamed page
+    STREAM_STOP = staticmethod(_wr_stream_stop)
+    # Bump whenever a change to the extraction code changes to_dict() output
+    PARSER_VERSION = 1
+
+    # Fields that to_dict() can produce, each read by its get_<field> method
+    FIELDS = ("definitions", "pronunciations", "inflections", "examples", "audio")
+
+    # Nothing is fetched or parsed until a getter needs it
+    @lazy_property
+    def soup(self) -> BeautifulSoup:
+        return self._get_soup()
+
+    @lazy_property
+    def article_head(self) -> Tag:
+        return self._get_article_head()
+
+    @lazy_property
+    def rows(self) -> dict[str, list[WRRow]]:
+        return self._get_rows()
+
+    @lazy_property
+    def compounds(self) -> list[str]:
+        # Read by _get_rows in the same pass as the definition rows
+        self.rows
+        return self.__dict__["compounds"]
 
     def _get_soup(self) -> BeautifulSoup:
-        """Fetches the webpage for the target word and returns a BeautifulSoup object."""
-        url = f"https://www.wordreference.com/fren/{self.target_word}"
-        self.soup = BeautifulSoup(requests.get(url).content, "html.parser")
+        """Fetches the webpage for the target word (unless pre-fetched) and returns a BeautifulSoup object."""
+        if self.stream:
+            return self._stream_soup()
+        html = self.html
+        if html is None:
+            with stage(self, "fetch"):
+                html = (self.fetcher or default_fetcher()).fetch(self.SOURCE, self.target_word)
+        with stage(self, "parse"):
+            self.soup = make_soup(html, self.parser, self.SECTIONS)
         return self.soup
     
+    def _stream_soup(self) -> BeautifulSoup:
+        """Parses only the needed sections of the page, read incrementally and cut short at STREAM_STOP."""
+        if self.html is None:
+            with stage(self, "fetch"):
+                html = (self.fetcher or default_fetcher()).fetch_sections(
+                    self.SOURCE, self.target_word, self.SECTIONS, self.STREAM_STOP())
+        else:
+            with stage(self, "parse"):
+                raw = self.html.encode() if isinstance(self.html, str) else self.html
+                html = stream_sections([raw], self.SECTIONS, self.STREAM_STOP())
+        with stage(self, "parse"):
+            self.soup = make_soup(html, self.parser)
+        return self.soup
+
     def _get_article_head(self) -> Tag:
         """Fetches the articleHead for the target word and returns a Tag object."""
         result = self.soup.find("div", id="articleHead") if self.soup else None
@@ -34,37 +265,45 @@ class WordReference:
             raise DefinitionNotFoundError("Definition does not exist")
         return result
 
-    def _get_tr_dict(self) -> dict[str, list[Tag]]:
-        """Fetches the data tables for the target word and returns a dict mapping strings to lists of Tags."""
+    @timed("rows")
+    def _get_rows(self) -> dict[str, list[WRRow]]:
+        """Extracts the definition tables in one pass and returns the rows grouped by definition id."""
         tables_all = self.soup.find_all("table", class_="WRD")
         if len(tables_all) == 0:
             raise DefinitionNotFoundError("Definition does not exist")
-        
-        # Filter out the "Formes composées"
-        tables_definitions = [table for table in tables_all
-                            if len(table.find_all("td", attrs={"title": "Principal Translations"})) != 0
-                            or len(table.find_all("td", attrs={"title": "Additional Translations"})) != 0
-                        ]
-
-        # Get word definitions
-        trs = []
-        # Definitions are contained in <td> class="ToWrd" within <td> lines with class="even" or "odd". 
-        # Some definitions have supplementary notes in <td> class="To2"
-        for table in tables_definitions:
-            trs.extend([tr for tr in table.find_all('tr') if any(x in tr.attrs['class'] for x in ('even', 'odd'))])
-        # Group tr lines by definition id
-        tr_dict = {}
-        id = ""
-        for tr in trs:
-            if 'id' in tr.attrs.keys():
-                id = tr.attrs['id']
-                if tr.attrs['id'] not in tr_dict:
-                    tr_dict[tr.attrs['id']] = []
-                    tr_dict[tr.attrs['id']].append(tr)
-            else:
-                tr_dict[id].append(tr)
-        return tr_dict
 
+        rows: dict[str, list[WRRow]] = {}
+        compounds: dict[str, None] = {}
+        id = ""
+        for table in tables_all:
+            # Definitions are contained in <td> class="ToWrd" within <tr> lines with class="even" or "odd".
+            # The table is only kept if it holds translations, which filters out the "Formes composées"
+            is_definitions = False
+            table_rows = []
+            for tr in table.find_all('tr'):
+                tds = tr.find_all('td')
+                if not is_definitions:
+                    is_definitions = any(td.get('title') in _TRANSLATION_TITLES for td in tds)
+                if any(x in tr.get('class', []) for x in ('even', 'odd')):
+                    table_rows.append((tr.get('id'), tds))
+            if not is_definitions:
+                # Keep the headwords of the compound forms (e.g. "pomme de terre"), in order and without repeats
+                for _, tds in table_rows:
+                    fr_wrd = next((td for td in tds if 'FrWrd' in td.get('class', [])), None)
+                    if fr_wrd is not None and fr_wrd.strong:
+                        compounds[fr_wrd.strong.text.strip()] = None
+                continue
+            # Group rows by definition id; rows without an id continue the previous group
+            for tr_id, tds in table_rows:
+                if tr_id is not None:
+                    id = tr_id
+                    if tr_id in rows:
+                        continue
+                rows.setdefault(id, []).append(_make_row(id, tds))
+        self.compounds = list(compounds)
+        return rows
+
+    @timed("get_pronunciations")
     def get_pronunciations(self) -> str:
         '''Fetches pronunciations from WordReference'''
         if not self.article_head:
@@ -75,6 +314,7 @@ class WordReference:
         else: 
             return pronunciation_span.text
 
+    @timed("get_inflections")
     def get_inflections(self) -> dict[str, list[str]]:
         '''Fetches inflections (primarily conjugations but listed in the html as inflections) from WordReference'''
         '''and returns a dict mapping the infinitive str to a list of conjugation descriptions'''
@@ -111,6 +351,17 @@ class WordReference:
                         inflections[infinitive] = conjugations
         return inflections
 
+    def related_words(self) -> list[str]:
+        '''The infinitives behind the target word and its compound forms: the words likely to be looked up next'''
+        try:
+            compounds = self.compounds
+        except DefinitionNotFoundError:
+            # Inflection-only pages have no definition tables
+            compounds = []
+        related = [word for word in chain(self.get_inflections(), compounds) if word != self.target_word]
+        return list(dict.fromkeys(related))
+
+    @timed("get_audio")
     def get_audio(self) -> list[str]:
         '''Fetches list of audio url strs from WordReference'''
         audio_scripts = [script.string for script in self.article_head.find_all('script') if "var audioFiles" in script.string]
@@ -232,6 +483,7 @@ class WordReference:
 
     #     return final_defs
 
+    @timed("get_definitions")
     def get_definitions(self) -> dict[str, str] | str:
         """
         If there are real definitions, returns a dict mapping
@@ -242,37 +494,19 @@ class WordReference:
         # detect an inflection‐only page
         is_inflection_only = bool(self.soup.find("div", class_="otherWRD"))
 
-        # 1) scrape all the <tr> groups into raw_defs
+        # 1) collect the senses of each row group into raw_defs
         raw_defs: dict[str, list[str]] = {}
-        for tr_list in self.tr_dict.values():
-            first = tr_list[0]
-            fr_td = first.find("td", class_="FrWrd")
-            if not fr_td or not fr_td.strong or not fr_td.em:
+        for rows in self.rows.values():
+            first = rows[0]
+            if first.fr_wrd is None:
                 continue
-            key = f"{fr_td.strong.text.strip()} ({fr_td.em.text.strip()})"
-            raw_defs.setdefault(key, [])
-
-            for tr in tr_list:
-                tds = tr.find_all("td")
-                if len(tds) < 3:
-                    continue
-
-                dsense = tds[1].find("span", class_="dsense")
-                prefix = f"({dsense.get_text(strip=True).strip('()')}) " if dsense else ""
-
-                # first real text node in the English cell
-                gloss = None
-                for node in tds[2].contents:
-                    if isinstance(node, NavigableString) and node.strip():
-                        gloss = node.strip()
-                        break
-                if not gloss:
+            key = f"{first.fr_wrd} ({first.pos})"
+            senses = raw_defs.setdefault(key, [])
+            for row in rows:
+                if row.gloss is None:
                     continue
-
-                if "⇒" in gloss:
-                    gloss = gloss.split("⇒", 1)[0].strip()
-
-                raw_defs[key].append(f"{prefix}{gloss}")
+                prefix = f"({row.dsense}) " if row.dsense is not None else ""
+                senses.append(f"{prefix}{row.gloss}")
 
         # 2) if we found nothing at all…
         if not raw_defs:
@@ -284,84 +518,158 @@ class WordReference:
         # 3) dedupe & enumerate the ones we did find
         final_defs: dict[str, str] = {}
         for key, senses in raw_defs.items():
-            seen: list[str] = []
-            for s in senses:
-                if s not in seen:
-                    seen.append(s)
+            seen = list(dict.fromkeys(senses))
             enumerated = "; ".join(f"{i+1}. {s}" for i, s in enumerate(seen))
             final_defs[key] = enumerated
 
         return final_defs
 
 
+    @timed("get_examples")
     def get_examples(self) -> list[str]:
         '''Fetches example sentences from WordReference, returns a list of strings'''
-        example_sentences = []
-
-        for tr_list in self.tr_dict.values():
-            for tr in tr_list:
-                tds = tr.find_all('td')
-                for td in tds:
-                    if 'FrEx' in td.get('class', []): 
-                        if td.get_text() not in example_sentences:
-                            # if self.target_word in td.get_text():
-                            example_sentences.append(td.get_text())  
-        return example_sentences
-    
-    def to_dict(self) -> dict:
-        '''Aggregate all collected data into a dictionary'''
-        inflections = self.get_inflections()
-        examples = self.get_examples()
-        audio = self.get_audio()
-        pronunciations = self.get_pronunciations()
-        definitions = self.get_definitions()
-
-        # Aggregate all collected data into a dictionary
-        return {
-            "target_word": self.target_word,
-            "definitions": definitions,
-            "pronunciations": pronunciations,
-            "inflections": inflections,
-            "examples": examples,
-            "audio": audio
-        }
+        # dict.fromkeys dedupes while keeping the order sentences first appear in
+        return list(dict.fromkeys(example for rows in self.rows.values() for row in rows for example in row.fr_ex))
+
+    @timed("to_dict")
+    def to_dict(self, fields: Iterable[str] | None = None) -> dict:
+        '''Aggregate all collected data (or only the given fields) into a dictionary'''
+        return _collect(self, fields)
+
+    @timed("extract")
+    def extract(self) -> Entry:
+        '''Extracts every field into an Entry and releases the parse tree'''
+        try:
+            return Entry(
+                self.SOURCE,
+                self.target_word,
+                definitions=self.get_definitions(),
+                pronunciations=self.get_pronunciations(),
+                inflections=self.get_inflections(),
+                examples=tuple(self.get_examples()),
+                audio=tuple(self.get_audio()),
+            )
+        finally:
+            self.release()
+
+    def release(self) -> None:
+        '''Decomposes the parse tree; getters called afterwards parse the page again'''
+        _release(self)
+
+# Wiktionnaire gender labels and the abbreviations used in entry keys
+_GENDERS = {
+    'féminin': '(nf)',
+    'masculin': '(nm)',
+    'masculin et féminin identiques': '(nmf)',
+}
+
+@dataclass(frozen=True)
+class WordGroup:
+    """One word group of a Wiktionnaire entry (e.g. 'pendule (nm)') with its definitions and examples."""
+    gender: str
+    definitions: tuple[str, ...]
+    examples: tuple[str, ...]
 
 @dataclass
 class Wiktionnaire:
     # target_word is the word that we want to define 
     target_word: str
-
-    def __post_init__(self):
-        self.soup = self._get_soup()
-        self.article_head = self._get_article_head()
-        self.p_pron = self._get_p_pron()
+    # html is the pre-fetched page; when given, no request is made
+    html: bytes | str | None = field(default=None, repr=False)
+    fetcher: Fetcher | None = field(default=None, repr=False, compare=False)
+    # parser is one of parsing.BACKENDS
+    parser: str = field(default=DEFAULT_BACKEND, repr=False, compare=False)
+    # stream reads only the sections in SECTIONS, stopping the download once STREAM_STOP says they are complete
+    stream: bool = field(default=False, repr=False, compare=False)
+    # index answers lookups from a local dump index instead of the website
+    index: DumpIndex | None = field(default=None, repr=False, compare=False)
+    # api fetches only the HEADING section, through the MediaWiki parse API, instead of the whole article
+    api: bool = field(default=False, repr=False, compare=False)
+
+    SOURCE = "wiktionnaire"
+    # Page sections read by this class, for subtree-only parser backends
+    SECTIONS = staticmethod(_wiktionnaire_sections)
+    # Makes the stop rule of a streamed page
+    STREAM_STOP = staticmethod(_wiktionnaire_stream_stop)
+    # The language section that is read, as titled on the article
+    HEADING = "Français"
+    # Bump whenever a change to the extraction code changes to_dict() output
+    PARSER_VERSION = 2
+
+    # Fields that to_dict() can produce, each read by its get_<field> method
+    FIELDS = ("definitions", "pronunciations", "examples", "audio")
+
+    # Nothing is fetched or parsed until a getter needs it
+    @lazy_property
+    def soup(self) -> BeautifulSoup:
+        return self._get_soup()
+
+    @lazy_property
+    def article_head(self) -> Tag:
+        return self._get_article_head()
+
+    @lazy_property
+    def p_pron(self) -> list[Tag]:
+        return self._get_p_pron()
+
+    @lazy_property
+    def _record(self) -> dict:
+        """Looks the target word up in the dump index."""
+        record = self.index.get(self.target_word)
+        if record is None:
+            raise DefinitionNotFoundError("Definition does not exist")
+        return record
 
     def _get_soup(self) -> BeautifulSoup:
-        url = f"https://fr.wiktionary.org/wiki/{self.target_word}"
-        self.soup = BeautifulSoup(requests.get(url).content, "html.parser")
+        if self.api and self.html is None:
+            with stage(self, "fetch"):
+                html = (self.fetcher or default_fetcher()).fetch_section(self.SOURCE, self.target_word, self.HEADING)
+            with stage(self, "parse"):
+                self.soup = make_soup(html, self.parser, self.SECTIONS)
+            return self.soup
+        if self.stream:
+            return self._stream_soup()
+        html = self.html
+        if html is None:
+            with stage(self, "fetch"):
+                html = (self.fetcher or default_fetcher()).fetch(self.SOURCE, self.target_word)
+        with stage(self, "parse"):
+            self.soup = make_soup(html, self.parser, self.SECTIONS)
         return self.soup
     
+    def _stream_soup(self) -> BeautifulSoup:
+        """Parses only the needed sections of the page, read incrementally and cut short at STREAM_STOP."""
+        if self.html is None:
+            with stage(self, "fetch"):
+                html = (self.fetcher or default_fetcher()).fetch_sections(
+                    self.SOURCE, self.target_word, self.SECTIONS, self.STREAM_STOP())
+        else:
+            with stage(self, "parse"):
+                raw = self.html.encode() if isinstance(self.html, str) else self.html
+                html = stream_sections([raw], self.SECTIONS, self.STREAM_STOP())
+        with stage(self, "parse"):
+            self.soup = make_soup(html, self.parser)
+        return self.soup
+
     def _get_article_head(self) -> Tag:
-        """Fetches the articleHead for the target word and returns a Tag object."""
+        """Fetches the article body for the target word, cut down to its HEADING section."""
         result = self.soup.find('div', class_='mw-content-ltr mw-parser-output') if self.soup else None
         if result is None:
             raise DefinitionNotFoundError("Definition does not exist")
+        _keep_section(result, self.HEADING)
         return result
         
         # return self.soup.find('div', class_='mw-content-ltr mw-parser-output') if self.soup else None
     
-    def _get_p_pron(self) -> list[str]:
-        """Fetches the p_pron spans and parses pronunciation, returning as a list of strs"""
-        p_all = self.article_head.find_all('p')
-        # Not all p tags contain both the pronunciation and gender; filter if missing
-        if p_all:
-            p_pron = []
-            for p in p_all:
-                p_pron.append(p)
-        return p_pron
+    def _get_p_pron(self) -> list[Tag]:
+        """Returns the <p> tags of the article head, which hold the pronunciations and genders"""
+        return list(self.article_head.find_all('p'))
 
+    @timed("get_pronunciations")
     def get_pronunciations(self) -> list[str]:
         """Fetches the pronunciations."""
+        if self.index is not None:
+            return list(self._record["pronunciations"])
         # Pronunciation
         pronunciations = []
 
@@ -393,31 +701,35 @@ class Wiktionnaire:
                 #     pronunciations.append(params['1']['wt'])
         return pronunciations
 
-    def get_genders(self) -> list[str]:
-        """Fetches the genders."""
-        # Pronunciation and Gender
+    @lazy_property
+    def _genders(self) -> list[str]:
+        """Parses the genders once; get_genders and the word groups share the result."""
+        if self.index is not None:
+            return list(self._record["genders"])
         genders = []
         if self.p_pron:
             for p in self.p_pron:
                 gender_span = p.find('span', class_="ligne-de-forme")
                 if gender_span:
                     gender_typeof = gender_span.find('i').get_text()
-
-                    gender_dict = {
-                        'féminin': '(nf)',
-                        'masculin': '(nm)',
-                        'masculin et féminin identiques': '(nmf)',
-                    }
-                    if gender_typeof in gender_dict:
-                        gender = gender_dict[gender_span.find('i').get_text()]
+                    if gender_typeof in _GENDERS:
+                        gender = _GENDERS[gender_typeof]
                         if gender not in genders:
                             genders.append(gender)
         return genders
+
+    @timed("get_genders")
+    def get_genders(self) -> list[str]:
+        """Fetches the genders."""
+        return list(self._genders)
     
+    @timed("get_audio")
     def get_audio(self) -> list[str]:
         '''Fetches list of audio url strs from Wiktionnaire'''
+        if self.index is not None:
+            return list(self._record["audio"])
         # audio_elements = self.soup.find_all('span', class_='audio-file')
-        audio_elements = self.soup.find_all('audio', class_='mw-file-element')
+        audio_elements = self.article_head.find_all('audio', class_='mw-file-element')
 
         audio_files = []
 
@@ -428,110 +740,84 @@ class Wiktionnaire:
             audio_files.append(link)
         return audio_files
 
-    def get_definitions(self) -> dict[str, list[str]]:   
-        '''Fetches the definitions'''
-        def_dict = {}
-        ''' 
-        <ol> is the master tag for definitions, but also supplemental info like translations, composite forms, etc.
-        We only want the definitions of each word, whose <ol> tags appear at the top. 
-        Normally, we'd just take the first <ol> tag, but some words like 'pendule' have different genders and thus different meanings (lets call these 'word groups').
-        So, get the length of the genders list and then use that to splice the ol_all list.
+    @lazy_property
+    @timed("word_groups")
+    def word_groups(self) -> list[WordGroup]:
+        '''Splits the entry into word groups, reading each <li> once for both definitions and examples'''
         '''
-        genders = self.get_genders()
-        definition_group_count = len(genders)
-        ol_all = self.article_head.find_all('ol')[:definition_group_count]
-        list_of_li_groups = []
-        '''
-        We want to group the <li> tags by their <ol> parent, each occurence of which should be a unique word group (i.e. [<tags> for 'pendule (nm)', <tags> for 'pendule (nf)'])
-        That way, we can keep the definitions of each word separate
-        '''
-        for ol in ol_all:
-            list_of_li_groups.append(ol.find_all('li'))
-        for li_list_idx, li_list in enumerate(list_of_li_groups):
-            def_list = []
-            for li in li_list:
-                def_str = ""
-                li_contents = li.contents
-                for item in li_contents:
-                    # Filter out the example sentences (contained in <span> and <ul> tags)
-                    if item.name is None or item.name not in ('span', 'ul'):
-                        if isinstance(item, Tag):
-                            def_str += item.get_text().replace('\n',' ')
-                        else:
-                            def_str += item.replace('\n',' ')
-                if def_str:
-                    def_list.append(def_str.strip())
-            def_dict[f'''{self.target_word} {genders[li_list_idx]}'''] = def_list
-        # Now we want to enumerate the definitions by each word group
-        def_dict_enum = {}
-        for target_word, list_of_defs in def_dict.items():
-            def_str = ''
-            for idx, definition in enumerate(list_of_defs, start=1):
-                def_str += f'''{idx}. {definition}'''
-                if idx < len(list_of_defs):
-                    def_str = def_str[:-1] + '; '
-                def_dict_enum[target_word] = def_str
-        return def_dict
-
-    def get_examples(self) -> dict[str, list[str]]:   
-        '''Fetches the definitions'''
-        example_dict = {}
-        ''' 
         <ol> is the master tag for definitions, but also supplemental info like translations, composite forms, etc.
         We only want the definitions of each word, whose <ol> tags appear at the top. 
         Normally, we'd just take the first <ol> tag, but some words like 'pendule' have different genders and thus different meanings (lets call these 'word groups').
         So, get the length of the genders list and then use that to splice the ol_all list.
         '''
-        genders = self.get_genders()
-        definition_group_count = len(genders)
-        ol_all = self.article_head.find_all('ol')[:definition_group_count]
-        list_of_li_groups = []
-        '''
-        We want to group the <li> tags by their <ol> parent, each occurence of which should be a unique word group (i.e. [<tags> for 'pendule (nm)', <tags> for 'pendule (nf)'])
-        That way, we can keep the definitions of each word separate
-        '''
-        for ol in ol_all:
-            list_of_li_groups.append(ol.find_all('li'))
-        for li_list_idx, li_list in enumerate(list_of_li_groups):
+        if self.index is not None:
+            return [WordGroup(group["gender"], tuple(group["definitions"]), tuple(group["examples"]))
+                    for group in self._record["groups"]]
+        genders = self._genders
+        ol_all = self.article_head.find_all('ol')[:len(genders)]
+        word_groups = []
+        # Each <ol> holds the <li> tags of one word group (i.e. 'pendule (nm)', then 'pendule (nf)')
+        for ol_idx, ol in enumerate(ol_all):
+            def_list = []
             example_list = []
-            for li in li_list:
+            for li in ol.find_all('li'):
+                def_str = ""
                 example_str = ""
-                li_contents = li.contents
-                for item in li_contents:
-                    # Filter out the example sentences (contained in <span> and <ul> tags)
+                for item in li.contents:
+                    # Example sentences are contained in <span> and <ul> tags, everything else is definition
                     if item.name in ('span', 'ul'):
                         example_str += item.get_text().replace('\xa0','')
+                    elif isinstance(item, Tag):
+                        def_str += item.get_text().replace('\n',' ')
+                    else:
+                        def_str += item.replace('\n',' ')
+                if def_str:
+                    def_list.append(def_str.strip())
                 if example_str:
                     example_list.append(example_str.strip())
-            example_dict[f'''{self.target_word} {genders[li_list_idx]}'''] = example_list
-        # Now we want to enumerate the definitions by each word group
-        example_dict_enum = {}
-        for target_word, list_of_defs in example_dict.items():
-            example_str = ''
-            for idx, definition in enumerate(list_of_defs, start=1):
-                example_str += f'''{idx}. {definition}'''
-                if idx < len(list_of_defs):
-                    example_str = example_str[:-1] + '; '
-                example_dict_enum[target_word] = example_str
-        return example_dict
+            word_groups.append(WordGroup(genders[ol_idx], tuple(def_list), tuple(example_list)))
+        return word_groups
+
+    @timed("get_definitions")
+    def get_definitions(self) -> dict[str, list[str]]:   
+        '''Fetches the definitions'''
+        return {f'''{self.target_word} {group.gender}''': list(group.definitions) for group in self.word_groups}
+
+    @timed("get_examples")
+    def get_examples(self) -> dict[str, list[str]]:   
+        '''Fetches the example sentences'''
+        return {f'''{self.target_word} {group.gender}''': list(group.examples) for group in self.word_groups}
     
-    def to_dict(self) -> dict:
-        '''Aggregate all collected data into a dictionary'''
-        # inflections = self.get_inflections()
-        examples = self.get_examples()
-        audio = self.get_audio()
-        pronunciations = self.get_pronunciations()
-        definitions = self.get_definitions()
-
-        # Aggregate all collected data into a dictionary
-        return {
-            "target_word": self.target_word,
-            "definitions": definitions,
-            "pronunciations": pronunciations,
-            # "inflections": inflections,
-            "examples": examples,
-            "audio": audio
-        }
+    @timed("to_dict")
+    def to_dict(self, fields: Iterable[str] | None = None) -> dict:
+        '''Aggregate all collected data (or only the given fields) into a dictionary'''
+        return _collect(self, fields)
+
+    @timed("extract")
+    def extract(self) -> Entry:
+        '''Extracts every field into an Entry and releases the parse tree'''
+        try:
+            return Entry(
+                self.SOURCE,
+                self.target_word,
+                definitions=self.get_definitions(),
+                pronunciations=tuple(self.get_pronunciations()),
+                genders=tuple(self.get_genders()),
+                examples=self.get_examples(),
+                audio=tuple(self.get_audio()),
+            )
+        finally:
+            self.release()
+
+    def release(self) -> None:
+        '''Decomposes the parse tree; getters called afterwards parse the page again'''
+        _release(self)
+
+# Entry classes keyed by source name
+SOURCES = {
+    WordReference.SOURCE: WordReference,
+    Wiktionnaire.SOURCE: Wiktionnaire,
+}
 
 # pp = pprint.PrettyPrinter(indent=4)
 
@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+from collections.abc import Iterable
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+def audio_url(link: str) -> str:
+    '''Turns an audio link from get_audio() into a full url (Wiktionnaire links have no scheme)'''
+    if "://" in link:
+        return link
+    return f"https://{link.lstrip('/')}"
+
+class MediaStore:
+    """
+    Content-addressed media files: each file is stored once as <root>/<ab>/<sha256><ext>,
+    however many urls (words, accents) point at the same content.
+    An index maps every downloaded url to its stored file.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(os.path.join(root, "partial"), exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(root, "index.db"), check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, name TEXT NOT NULL)")
+        self.conn.commit()
+
+    def path_for(self, url: str) -> str | None:
+        '''Returns the stored file for a url, or None if it has not been downloaded'''
+        with self._lock:
+            row = self.conn.execute("SELECT name FROM urls WHERE url = ?", (audio_url(url),)).fetchone()
+        if row is None:
+            return None
+        path = os.path.join(self.root, row[0])
+        return path if os.path.exists(path) else None
+
+    def paths_for(self, urls: Iterable[str]) -> list[str]:
+        '''Returns the stored files for the downloaded urls, in order and without repeats'''
+        paths = (self.path_for(url) for url in urls)
+        return list(dict.fromkeys(path for path in paths if path))
+
+    def partial_path(self, url: str) -> str:
+        '''Where an unfinished download of url is kept between attempts'''
+        return os.path.join(self.root, "partial", hashlib.sha1(url.encode()).hexdigest())
+
+    def add(self, url: str, file: str) -> str:
+        '''Moves a completed download into the store under its content hash and returns the stored path'''
+        sha256 = hashlib.sha256()
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                sha256.update(chunk)
+        digest = sha256.hexdigest()
+        ext = os.path.splitext(urlsplit(url).path)[1]
+        name = os.path.join(digest[:2], digest + ext)
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            # Same content already stored under another url
+            os.remove(file)
+        else:
+            os.replace(file, path)
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO urls (url, name) VALUES (?, ?)", (url, name))
+        return path
+
+class MediaFetcher:
+    """
+    Downloads media into a MediaStore concurrently, with at most per_host downloads per host.
+    Each url is downloaded once, and interrupted downloads resume from where they stopped.
+    """
+
+    def __init__(self, store: MediaStore, per_host: int = 4, concurrency: int = 16, timeout: float = 60):
+        self.store = store
+        self.per_host = per_host
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=per_host)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.downloaded = 0
+        self.reused = 0
+
+    def _download(self, url: str) -> str:
+        '''Downloads url (resuming a partial file if there is one) and stores it'''
+        partial = self.store.partial_path(url)
+        offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416:
+                # The partial file already holds the whole body
+                return self.store.add(url, partial)
+            response.raise_for_status()
+            # A server that ignores Range sends the whole body again
+            mode = "ab" if response.status_code == 206 else "wb"
+            with open(partial, mode) as f:
+                for chunk in response.iter_content(1 << 16):
+                    f.write(chunk)
+        return self.store.add(url, partial)
+
+    async def fetch_all(self, links: Iterable[str]) -> dict[str, str | None]:
+        '''Downloads every link not yet in the store; returns url -> stored path (None if it failed)'''
+        host_limits: dict[str, asyncio.Semaphore] = {}
+        limit = asyncio.Semaphore(self.concurrency)
+        results: dict[str, str | None] = {}
+
+        async def fetch(url: str) -> None:
+            host = urlsplit(url).netloc
+            host_limit = host_limits.setdefault(host, asyncio.Semaphore(self.per_host))
+            async with limit, host_limit:
+                try:
+                    results[url] = await asyncio.to_thread(self._download, url)
+                    self.downloaded += 1
+                except (requests.RequestException, OSError):
+                    results[url] = None
+
+        tasks = []
+        for url in dict.fromkeys(audio_url(link) for link in links):
+            path = self.store.path_for(url)
+            if path is not None:
+                results[url] = path
+                self.reused += 1
+            else:
+                tasks.append(fetch(url))
+        await asyncio.gather(*tasks)
+        return results
+
+    def fetch_entries(self, entries: Iterable[dict]) -> dict[str, str | None]:
+        '''Downloads the audio of to_dict() entries'''
+        return asyncio.run(self.fetch_all(link for entry in entries for link in entry.get("audio", [])))
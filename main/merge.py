@@ -0,0 +1,118 @@
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from .errors import DefinitionNotFoundError
+from .fetch import Fetcher
+from .lib import Entry, Wiktionnaire, WordReference
+from .scheduler import uncoalesced
+from .wikidump import DumpIndex
+
+# Seconds each source gets before its fields are given up on
+DEFAULT_TIMEOUTS = {
+    "wordreference": 10.0,
+    "wiktionnaire": 10.0,
+}
+
+# Lookups run here rather than on the event loop's default executor, so that a timed-out
+# lookup still running in the background doesn't hold up asyncio.run() at shutdown
+_executor = ThreadPoolExecutor(thread_name_prefix="merged-lookup")
+
+# Merged field -> the (source, Entry field) pairs it is taken from, in order of precedence.
+# The first source with a non-empty value wins, except for audio, which is combined.
+PRECEDENCE = {
+    "definitions": [("wordreference", "definitions")],
+    "definitions_fr": [("wiktionnaire", "definitions")],
+    "pronunciations": [("wiktionnaire", "pronunciations"), ("wordreference", "pronunciations")],
+    "genders": [("wiktionnaire", "genders")],
+    "inflections": [("wordreference", "inflections")],
+    # WordReference examples are a list, Wiktionnaire's are keyed by word group like its definitions
+    "examples": [("wordreference", "examples")],
+    "examples_fr": [("wiktionnaire", "examples")],
+    "audio": [("wordreference", "audio"), ("wiktionnaire", "audio")],
+}
+
+def _uncoalesced_call(call: Callable[[], Entry]) -> Entry:
+    '''Runs call making its own requests, rather than waiting on the identical ones it hedges against'''
+    with uncoalesced():
+        return call()
+
+async def _hedged(call: Callable[[], Entry], hedge_after: float | None) -> Entry:
+    '''Runs call on a thread; if it hasn't finished after hedge_after seconds, races a second attempt'''
+    loop = asyncio.get_running_loop()
+    attempts = {loop.run_in_executor(_executor, call)}
+    if hedge_after is not None:
+        done, _ = await asyncio.wait(attempts, timeout=hedge_after)
+        if not done:
+            attempts.add(loop.run_in_executor(_executor, _uncoalesced_call, call))
+    error = None
+    try:
+        while attempts:
+            done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None:
+                    return attempt.result()
+                error = attempt.exception()
+        raise error
+    finally:
+        # The losing attempt's thread finishes on its own; its result is ignored
+        for attempt in attempts:
+            attempt.cancel()
+
+def merge(word: str, entries: dict[str, Entry], errors: dict[str, str]) -> dict:
+    '''Merges the Entry of each source that answered into one card dictionary'''
+    merged = {"target_word": word}
+    for name, candidates in PRECEDENCE.items():
+        values = [getattr(entries[source], field) for source, field in candidates if source in entries]
+        if name == "audio":
+            merged[name] = list(dict.fromkeys(link for links in values for link in links))
+            continue
+        value = next((value for value in values if value), None)
+        if isinstance(value, tuple):
+            value = list(value)
+        elif name == "pronunciations" and isinstance(value, str):
+            # WordReference gives a single pronunciation string
+            value = [value]
+        merged[name] = value if value is not None else ({} if name in ("definitions", "definitions_fr", "examples_fr", "inflections") else [])
+    # Sources that failed or timed out, so callers can tell a degraded card from an empty field
+    merged["missing"] = errors
+    return merged
+
+async def lookup_merged(word: str, fetcher: Fetcher | None = None, timeouts: dict[str, float] | None = None,
+                        hedge_after: dict[str, float] | None = None, index: DumpIndex | None = None) -> dict:
+    """
+    Looks a word up on WordReference and Wiktionnaire at the same time and merges the results
+    by PRECEDENCE. Each source has its own deadline; a source that fails or misses it only
+    leaves its fields empty (and is listed under "missing"), so the card takes as long as the
+    slowest source within its deadline, not the sum of both.
+    hedge_after (per source, seconds) starts a duplicate request when the first one is slow.
+    """
+    timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+    hedge_after = hedge_after or {}
+    calls = {
+        "wordreference": lambda: WordReference(word, fetcher=fetcher).extract(),
+        "wiktionnaire": lambda: Wiktionnaire(word, fetcher=fetcher, index=index).extract(),
+    }
+
+    async def run(source: str) -> Entry:
+        return await asyncio.wait_for(_hedged(calls[source], hedge_after.get(source)), timeouts[source])
+
+    results = await asyncio.gather(*(run(source) for source in calls), return_exceptions=True)
+    entries, errors = {}, {}
+    for source, result in zip(calls, results):
+        if isinstance(result, Entry):
+            entries[source] = result
+        elif isinstance(result, asyncio.TimeoutError):
+            errors[source] = f"timed out after {timeouts[source]}s"
+        elif isinstance(result, Exception):
+            # Not found, network errors, and extraction bugs on an odd page alike only cost this source
+            errors[source] = str(result) or type(result).__name__
+        else:
+            raise result
+    if not entries:
+        raise DefinitionNotFoundError(f"No source could define {word!r}: {errors}")
+    return merge(word, entries, errors)
+
+def merged_lookup(word: str, **kwargs) -> dict:
+    '''Blocking wrapper around lookup_merged'''
+    return asyncio.run(lookup_merged(word, **kwargs))
@@ -0,0 +1,174 @@
+import codecs
+from collections.abc import Callable, Iterable
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+try:
+    from bs4.filter import ElementFilter
+except ImportError:  # Beautiful Soup < 4.13
+    ElementFilter = None
+
+# Parser backends: name -> (tree builder, whether to parse only the sections an entry class reads).
+# The lxml backends need the optional lxml package.
+BACKENDS = {
+    "html.parser": ("html.parser", False),
+    "html.parser-subtree": ("html.parser", True),
+    "lxml": ("lxml", False),
+    "lxml-subtree": ("lxml", True),
+}
+DEFAULT_BACKEND = "html.parser"
+
+def backend_available(backend: str) -> bool:
+    '''Checks whether the tree builder of a backend is installed'''
+    return builder_registry.lookup(BACKENDS[backend][0]) is not None
+
+# A section matcher takes a tag name and its raw attributes and says whether to keep that subtree
+SectionMatcher = Callable[[str, dict], bool]
+# A stop rule is called as stop(event, name, attrs) on every "start" and "end" tag event of a
+# streamed page and says whether everything needed has been seen; make one per page, as it may keep state
+StopRule = Callable[[str, str, dict], bool]
+
+# Elements that never have an end tag
+_VOID = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+
+def class_list(attrs: dict) -> list[str]:
+    '''Returns the classes of a tag from its raw attributes'''
+    value = attrs.get("class") or []
+    return value.split() if isinstance(value, str) else list(value)
+
+if ElementFilter is not None:
+    class _SubtreeFilter(ElementFilter):
+        """Keeps only top-level subtrees accepted by a section matcher, and no loose strings."""
+
+        def __init__(self, match: SectionMatcher):
+            super().__init__()
+            self.section_match = match
+
+        def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+            return self.section_match(name, attrs or {})
+
+        def allow_string_creation(self, string) -> bool:
+            return False
+
+def subtree_strainer(match: SectionMatcher):
+    '''Builds a parse_only filter from a section matcher for the installed Beautiful Soup'''
+    if ElementFilter is None:
+        return SoupStrainer(lambda name, attrs: isinstance(name, str) and match(name, dict(attrs)))
+    return _SubtreeFilter(match)
+
+def make_soup(html: bytes | str, backend: str = DEFAULT_BACKEND, sections: SectionMatcher | None = None) -> BeautifulSoup:
+    """
+    Parses html with the given backend. Subtree backends skip everything outside
+    the elements accepted by `sections` (navigation, ads, scripts, ...).
+    """
+    builder, subtree_only = BACKENDS[backend]
+    if subtree_only and sections is not None:
+        return BeautifulSoup(html, builder, parse_only=subtree_strainer(sections))
+    return BeautifulSoup(html, builder)
+
+class SectionStream(HTMLParser):
+    """
+    Event-based extraction of the sections of a page that an entry class reads, fed in chunks
+    as the page downloads. Only the source of the sections accepted by `sections` is kept;
+    once `stop` says the page has nothing more to offer, `done` is set and further input is
+    ignored, and html() closes whatever was still open.
+    """
+
+    def __init__(self, sections: SectionMatcher, stop: StopRule | None = None):
+        super().__init__(convert_charrefs=False)
+        self.sections = sections
+        self.stop = stop
+        self.done = False
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._out: list[str] = []
+        # (name, attrs) of the open elements; kept is the stack depth of the section being kept, if any
+        self._open: list[tuple[str, dict]] = []
+        self._kept: int | None = None
+
+    def feed_bytes(self, chunk: bytes) -> bool:
+        '''Feeds a chunk of the raw page; returns True once the rest of the page is not needed'''
+        if not self.done:
+            self.feed(self._decoder.decode(chunk))
+        return self.done
+
+    def _emit(self, text: str) -> None:
+        if self._kept is not None and not self.done:
+            self._out.append(text)
+
+    def _check(self, event: str, name: str, attrs: dict) -> None:
+        if not self.done and self.stop is not None and self.stop(event, name, attrs):
+            self.done = True
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        attrs = dict(attrs)
+        self._check("start", tag, attrs)
+        if self.done:
+            return
+        if self._kept is None and self.sections(tag, attrs):
+            self._kept = len(self._open)
+        self._emit(self.get_starttag_text())
+        if tag not in _VOID:
+            self._open.append((tag, attrs))
+        elif self._kept == len(self._open):
+            self._kept = None
+
+    def handle_startendtag(self, tag, attrs):
+        if self.done:
+            return
+        attrs = dict(attrs)
+        self._check("start", tag, attrs)
+        if self._kept is not None:
+            self._emit(self.get_starttag_text())
+        elif self.sections(tag, attrs):
+            self._out.append(self.get_starttag_text())
+
+    def handle_endtag(self, tag):
+        if self.done or not any(name == tag for name, _ in self._open):
+            return
+        # Unclosed elements inside this one (e.g. <p> or <li>) end with it, as in a browser
+        while True:
+            name, attrs = self._open.pop()
+            self._emit(f"</{name}>")
+            if self._kept == len(self._open):
+                self._kept = None
+            self._check("end", name, attrs)
+            if name == tag or self.done:
+                return
+
+    def handle_data(self, data):
+        self._emit(data)
+
+    def handle_entityref(self, name):
+        self._emit(f"&{name};")
+
+    def handle_charref(self, name):
+        self._emit(f"&#{name};")
+
+    def handle_comment(self, data):
+        pass
+
+    def close(self) -> None:
+        '''Processes whatever is left once the whole page has been fed'''
+        if not self.done:
+            self.feed(self._decoder.decode(b"", final=True))
+        super().close()
+
+    def html(self) -> str:
+        '''The kept sections, with any elements still open at the stop closed'''
+        if self._kept is None:
+            return "".join(self._out)
+        closing = [f"</{name}>" for name, _ in reversed(self._open[self._kept:])]
+        return "".join(self._out + closing)
+
+def stream_sections(chunks: Iterable[bytes], sections: SectionMatcher, stop: StopRule | None = None) -> str:
+    '''Extracts the sections of a page from its chunks, not reading chunks past the stop'''
+    collector = SectionStream(sections, stop)
+    for chunk in chunks:
+        if collector.feed_bytes(chunk):
+            break
+    else:
+        collector.close()
+    return collector.html()
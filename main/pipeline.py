@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+
+import requests
+
+from .batch import LookupResult
+from .errors import DefinitionNotFoundError
+from .fetch import Fetcher
+from .lib import SOURCES
+from .parsing import DEFAULT_BACKEND
+from .scheduler import BULK, default_scheduler
+
+def _extract(source: str, word: str, html: bytes, parser: str,
+             fields: tuple[str, ...] | None) -> tuple[dict | None, Exception | None, float]:
+    '''Parse-stage worker: runs the extraction in a pool process and returns plain data, never soup'''
+    start = time.perf_counter()
+    try:
+        data, error = SOURCES[source](word, html=html, parser=parser).to_dict(fields), None
+    except Exception as e:
+        # Including extraction bugs on an odd page, so that one word can't stop the whole batch
+        data, error = None, e
+    return data, error, time.perf_counter() - start
+
+@dataclass
+class StageStats:
+    # items is how many words went through the stage, busy the seconds spent working on them
+    items: int = 0
+    busy: float = 0.0
+
+class Pipeline:
+    """
+    fetch -> parse -> write pipeline for batch lookups.
+    Pages are fetched on a thread pool, the CPU-bound extraction runs on a process pool
+    (one process per core by default), and results are yielded to the writer in input order.
+    At most max_pending words are between fetch and write at any time: when the window is
+    full the pipeline stops reading words until the writer has taken the oldest result.
+    """
+
+    def __init__(self, source: str = "wordreference", fetcher: Fetcher | None = None, fetch_workers: int = 8,
+                 parse_workers: int | None = None, max_pending: int = 64, parser: str = DEFAULT_BACKEND,
+                 fields: Iterable[str] | None = None):
+        self.source = source
+        self.fetcher = fetcher or Fetcher(pool_size=fetch_workers, scheduler=default_scheduler(), priority=BULK)
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.parser = parser
+        self.fields = None if fields is None else tuple(fields)
+        self.stats = {stage: StageStats() for stage in ("fetch", "parse", "write")}
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def _count(self, stage: str, busy: float) -> None:
+        with self._lock:
+            self.stats[stage].items += 1
+            self.stats[stage].busy += busy
+
+    def _fetch(self, word: str) -> bytes:
+        start = time.perf_counter()
+        html = self.fetcher.fetch(self.source, word)
+        self._count("fetch", time.perf_counter() - start)
+        return html
+
+    def run(self, words: Iterable[str]) -> Iterator[LookupResult]:
+        '''Looks up every word, yielding results in input order'''
+        start = time.perf_counter()
+        window: deque[tuple[str, Future]] = deque()
+        with ThreadPoolExecutor(self.fetch_workers) as fetch_pool, ProcessPoolExecutor(self.parse_workers) as parse_pool:
+
+            def submit(word: str) -> Future:
+                # The result future completes once the page is fetched and then parsed
+                result = Future()
+
+                def parsed(future: Future) -> None:
+                    try:
+                        data, error, busy = future.result()
+                    except Exception as e:
+                        # e.g. a crashed worker process; surfaces to the writer
+                        result.set_exception(e)
+                        return
+                    self._count("parse", busy)
+                    result.set_result(LookupResult(word, data=data, error=error))
+
+                def fetched(future: Future) -> None:
+                    try:
+                        html = future.result()
+                    except (DefinitionNotFoundError, requests.RequestException) as e:
+                        result.set_result(LookupResult(word, error=e))
+                        return
+                    except Exception as e:
+                        result.set_exception(e)
+                        return
+                    try:
+                        parse_pool.submit(_extract, self.source, word, html, self.parser,
+                                          self.fields).add_done_callback(parsed)
+                    except RuntimeError as e:
+                        # The pool is shutting down because the run was abandoned
+                        result.set_exception(e)
+
+                fetch_pool.submit(self._fetch, word).add_done_callback(fetched)
+                return result
+
+            def write() -> LookupResult:
+                # The write stage's busy time is how long the writer waited on the next in-order result
+                word, future = window.popleft()
+                wait = time.perf_counter()
+                result = future.result()
+                self._count("write", time.perf_counter() - wait)
+                return result
+
+            for word in words:
+                if len(window) >= self.max_pending:
+                    yield write()
+                window.append((word, submit(word)))
+            while window:
+                yield write()
+        self.elapsed = time.perf_counter() - start
+
+    def throughput(self) -> dict[str, dict[str, float]]:
+        '''Per-stage counters: items, busy seconds, and items per second of wall-clock time'''
+        elapsed = self.elapsed or 1e-9
+        return {stage: {"items": stats.items, "busy": stats.busy, "per_sec": stats.items / elapsed}
+                for stage, stats in self.stats.items()}
@@ -0,0 +1,98 @@
+import threading
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .cache import normalize_word
+from .errors import DefinitionNotFoundError
+from .fetch import Fetcher
+from .lib import WordReference
+from .scheduler import BULK, default_scheduler
+
+class Prefetcher:
+    """
+    Warms a Fetcher's cache in the background with the pages a user is likely to look up
+    next: the infinitive behind a conjugated form and the compound forms listed with a word
+    (see WordReference.related_words()).
+
+    Prefetches are made in the BULK lane of the fetcher's scheduler, so they never hold up
+    interactive lookups, and at most `budget` pages are downloaded over the prefetcher's life
+    (`per_entry` per followed entry). Pages that are already cached don't count. When the
+    fetcher has a scheduler, an interactive lookup of a word that is still being prefetched
+    joins that fetch, moving it to the interactive lane, rather than making its own.
+
+        prefetcher = Prefetcher(fetcher)
+        entry = WordReference("mangeait", fetcher=fetcher)
+        card = entry.to_dict()
+        prefetcher.follow(entry)
+    """
+
+    def __init__(self, fetcher: Fetcher, sources: Iterable[str] = ("wordreference",), budget: int = 100,
+                 per_entry: int = 10, workers: int = 2):
+        if fetcher.cache is None:
+            raise ValueError("Prefetching needs a Fetcher with a cache to warm")
+        self.fetcher = Fetcher(pool_size=workers, urls=fetcher.urls, timeout=fetcher.timeout,
+                               cache=fetcher.cache, retries=fetcher.retries, backoff=fetcher.backoff,
+                               backoff_max=fetcher.backoff_max, api_urls=fetcher.api_urls,
+                               scheduler=fetcher.scheduler or default_scheduler(), priority=BULK)
+        self.sources = tuple(sources)
+        self.budget = budget
+        self.per_entry = per_entry
+        # queued: pages submitted; fetched: downloaded; cached: already there; failed: not found or errors
+        self.counters = {"queued": 0, "fetched": 0, "cached": 0, "failed": 0}
+        self._seen: set[tuple[str, str]] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+
+    def follow(self, entry: WordReference) -> None:
+        '''Queues the words related to an entry that has been looked up'''
+        try:
+            related = entry.related_words()
+        except DefinitionNotFoundError:
+            return
+        self.submit(related[:self.per_entry])
+
+    def submit(self, words: Iterable[str]) -> None:
+        '''Queues words for prefetching, skipping ones already queued and any past the budget'''
+        for word in words:
+            for source in self.sources:
+                key = (source, normalize_word(word, source))
+                with self._lock:
+                    if key in self._seen or self.counters["queued"] - self.counters["cached"] >= self.budget:
+                        continue
+                    self._seen.add(key)
+                    self.counters["queued"] += 1
+                self._executor.submit(self._prefetch, source, word)
+
+    def _prefetch(self, source: str, word: str) -> None:
+        # Checking isn't a use of the page, so it mustn't skew the cache's hit rate or LRU order
+        cached = self.fetcher.cache.peek(source, word)
+        if cached is not None and cached.fresh:
+            self._count("cached")
+            return
+        try:
+            self.fetcher.fetch(source, word)
+        except (DefinitionNotFoundError, requests.RequestException):
+            self._count("failed")
+        else:
+            self._count("fetched")
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self) -> dict:
+        '''Returns the prefetch counters'''
+        with self._lock:
+            return dict(self.counters)
+
+    def close(self) -> None:
+        '''Drops the prefetches that haven't started and waits for the running ones'''
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "Prefetcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,173 @@
+import itertools
+import threading
+import time
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TypeVar
+
+T = TypeVar("T")
+
+# Priority lanes: lower goes first
+INTERACTIVE = 0
+BULK = 1
+
+# Requests per second and burst size allowed per host; hosts not listed are not limited
+DEFAULT_RATES = {
+    "www.wordreference.com": (2.0, 4),
+    "fr.wiktionary.org": (5.0, 10),
+}
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, and bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        '''Takes a token if there is one and returns 0, otherwise returns the seconds until there is one'''
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+@dataclass
+class _Flight:
+    # A request in flight that identical requests wait on; priority is raised when a more urgent one joins
+    priority: int
+    future: Future
+
+@dataclass(eq=False)
+class _Ticket:
+    priority: int
+    seq: int
+    flight: _Flight | None
+
+    @property
+    def lane(self) -> int:
+        return self.flight.priority if self.flight is not None else self.priority
+
+@dataclass
+class LaneStats:
+    # requests is how many requests went through the lane, waited the total seconds they were held back
+    requests: int = 0
+    waited: float = 0.0
+    max_wait: float = 0.0
+
+# The coalesced request the current thread is running, whose priority its token requests take
+_current_flight: ContextVar[_Flight | None] = ContextVar("current_flight", default=None)
+# Set while the current thread's calls must make their own requests (see uncoalesced())
+_uncoalesced: ContextVar[bool] = ContextVar("uncoalesced", default=False)
+
+@contextmanager
+def uncoalesced():
+    '''Within this block, Scheduler.run() never joins a call in flight, e.g. for a hedged second attempt'''
+    token = _uncoalesced.set(True)
+    try:
+        yield
+    finally:
+        _uncoalesced.reset(token)
+
+class Scheduler:
+    """
+    Shares per-host request budgets between every Fetcher that uses it.
+    Each host has a token bucket; requests waiting for a token are served by priority lane
+    (INTERACTIVE before BULK) and then in arrival order, so a bulk job keeps the host at its
+    allowed rate while an interactive lookup waits for at most the next token.
+    Identical requests made while one is in flight are coalesced into that one (see run()).
+    """
+
+    def __init__(self, rates: dict[str, tuple[float, float]] | None = None):
+        self.rates = {**DEFAULT_RATES, **(rates or {})}
+        self.lanes: dict[int, LaneStats] = {}
+        self.coalesced = 0
+        self._buckets: dict[str, TokenBucket] = {}
+        self._waiters: dict[str, list[_Ticket]] = {}
+        self._inflight: dict[Hashable, _Flight] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def acquire(self, host: str, priority: int = INTERACTIVE) -> None:
+        '''Blocks until a request to host may be sent'''
+        start = time.monotonic()
+        if host in self.rates:
+            ticket = _Ticket(priority, next(self._seq), _current_flight.get())
+            with self._cond:
+                if host not in self._buckets:
+                    self._buckets[host] = TokenBucket(*self.rates[host])
+                waiters = self._waiters.setdefault(host, [])
+                waiters.append(ticket)
+                try:
+                    while True:
+                        head = min(waiters, key=lambda t: (t.lane, t.seq))
+                        wait = self._buckets[host].take() if head is ticket else None
+                        if wait == 0:
+                            break
+                        self._cond.wait(wait)
+                finally:
+                    waiters.remove(ticket)
+                    self._cond.notify_all()
+            priority = ticket.lane
+        waited = time.monotonic() - start
+        with self._cond:
+            stats = self.lanes.setdefault(priority, LaneStats())
+            stats.requests += 1
+            stats.waited += waited
+            stats.max_wait = max(stats.max_wait, waited)
+
+    def run(self, key: Hashable, priority: int, call: Callable[[], T]) -> T:
+        """
+        Runs call, unless a call with the same key is already in flight, in which case its result
+        is shared. A more urgent caller joining a queued call moves it to its own lane.
+        Inside uncoalesced(), call always runs on its own.
+        """
+        if _uncoalesced.get():
+            return call()
+        with self._cond:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight(priority, Future())
+            else:
+                self.coalesced += 1
+                if priority < flight.priority:
+                    flight.priority = priority
+                    self._cond.notify_all()
+        if not leader:
+            return flight.future.result()
+        token = _current_flight.set(flight)
+        try:
+            result = call()
+        except BaseException as e:
+            flight.future.set_exception(e)
+            raise
+        else:
+            flight.future.set_result(result)
+            return result
+        finally:
+            _current_flight.reset(token)
+            with self._cond:
+                del self._inflight[key]
+
+    def stats(self) -> dict:
+        '''Per-lane request counts and waits, and how many requests were coalesced'''
+        with self._cond:
+            return {"lanes": {lane: vars(stats).copy() for lane, stats in self.lanes.items()},
+                    "coalesced": self.coalesced}
+
+_default_scheduler: Scheduler | None = None
+
+def default_scheduler() -> Scheduler:
+    """Returns the process-wide Scheduler, creating it on first use."""
+    global _default_scheduler
+    if _default_scheduler is None:
+        _default_scheduler = Scheduler()
+    return _default_scheduler
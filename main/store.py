@@ -0,0 +1,233 @@
+import json
+import sqlite3
+import time
+from collections.abc import Iterable
+
+from .cache import normalize_word
+from .errors import DefinitionNotFoundError
+from .fetch import Fetcher, default_fetcher
+from .lib import SOURCES
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    source TEXT NOT NULL,
+    word TEXT NOT NULL,
+    parser_version INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    data TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    PRIMARY KEY (source, word)
+)
+"""
+
+# Full-text index over the definitions and examples of the stored entries. unicode61 with
+# remove_diacritics folds case and accents (élève matches eleve) and splits on apostrophes
+# (l'arbre is l + arbre). indexed maps each entry to its document, since the rowids of
+# entries aren't stable across a VACUUM.
+_TEXT_SCHEMA = """
+CREATE VIRTUAL TABLE entry_text USING fts5(
+    definitions, examples, tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE indexed (
+    docid INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    word TEXT NOT NULL,
+    UNIQUE (source, word)
+);
+"""
+
+# Fields of to_dict() output that are indexed, which are also the columns of entry_text
+TEXT_FIELDS = ("definitions", "examples")
+
+def _text(value) -> str:
+    '''Joins the strings of a to_dict() field, leaving out the headword keys of dicts'''
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        value = value.values()
+    return "\n".join(_text(item) for item in value)
+
+def _match(query: str, fields: Iterable[str]) -> str:
+    """
+    Builds an FTS5 query matching entries whose fields hold every word of query.
+    A word ending in * matches as a prefix; everything else is taken literally.
+    """
+    terms = []
+    for term in query.split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*")
+        if term:
+            terms.append('"' + term.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return "{" + " ".join(fields) + "}: (" + " AND ".join(terms) + ")" if terms else ""
+
+class EntryStore:
+    """
+    SQLite store of to_dict() output per source and normalized word.
+    A row is current while its parser_version matches the entry class's PARSER_VERSION
+    and it is younger than max_age seconds (when max_age is set). Rows keep the page's
+    ETag/Last-Modified, so refreshing an old row whose page hasn't changed costs a 304
+    and no re-parse. Definitions and examples are full-text indexed as entries are stored
+    (see search()).
+    """
+
+    def __init__(self, path: str, max_age: float | None = None):
+        self.path = path
+        self.max_age = max_age
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(_SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(entries)")}
+        for column in ("etag", "last_modified"):
+            if column not in columns:
+                # Stores created before validators were kept
+                self.conn.execute(f"ALTER TABLE entries ADD COLUMN {column} TEXT")
+        self.conn.commit()
+        if not self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'entry_text'").fetchone():
+            # New store, or one created before entries were indexed
+            with self.conn:
+                self.conn.executescript(_TEXT_SCHEMA)
+                rows = self.conn.execute("SELECT source, word, data FROM entries").fetchall()
+                self._index((source, word, json.loads(data)) for source, word, data in rows)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _current(self, source: str, parser_version: int, updated_at: float) -> bool:
+        '''Checks whether a stored row can be used as-is'''
+        if parser_version != SOURCES[source].PARSER_VERSION:
+            return False
+        return self.max_age is None or time.time() - updated_at <= self.max_age
+
+    def _rows(self, source: str, words: Iterable[str]) -> list[tuple]:
+        '''Returns (word, parser_version, updated_at, data, etag, last_modified) rows for words in a single query'''
+        keys = sorted({normalize_word(word, source) for word in words})
+        return self.conn.execute(
+            "SELECT word, parser_version, updated_at, data, etag, last_modified FROM entries"
+            " WHERE source = ? AND word IN (SELECT value FROM json_each(?))",
+            (source, json.dumps(keys)),
+        ).fetchall()
+
+    def get_many(self, source: str, words: Iterable[str]) -> dict[str, dict]:
+        '''Returns the current stored entries for words, keyed by normalized word, in a single query'''
+        return {word: json.loads(data) for word, version, updated_at, data, _, _ in self._rows(source, words)
+                if self._current(source, version, updated_at)}
+
+    def get(self, source: str, word: str) -> dict | None:
+        return self.get_many(source, [word]).get(normalize_word(word, source))
+
+    def _index(self, entries: Iterable[tuple[str, str, dict]]) -> None:
+        '''Indexes (source, normalized word, to_dict()) entries, replacing what was indexed for them before'''
+        for source, word, entry in entries:
+            old = self.conn.execute("SELECT docid FROM indexed WHERE source = ? AND word = ?", (source, word)).fetchone()
+            if old is not None:
+                self.conn.execute("DELETE FROM entry_text WHERE rowid = ?", old)
+            docid = self.conn.execute(
+                "INSERT INTO entry_text (definitions, examples) VALUES (?, ?)",
+                [_text(entry.get(name, "")) for name in TEXT_FIELDS],
+            ).lastrowid
+            self.conn.execute("INSERT OR REPLACE INTO indexed (docid, source, word) VALUES (?, ?, ?)",
+                              (docid, source, word))
+
+    def search(self, query: str, fields: Iterable[str] = TEXT_FIELDS, source: str | None = None,
+               limit: int | None = 100) -> list[tuple[str, dict]]:
+        """
+        Returns (source, entry) for the stored entries whose given fields contain every word
+        of query, best matches first. Matching ignores case and accents; a word ending in *
+        matches as a prefix (pomm* finds pomme and pommier).
+        """
+        fields = tuple(fields)
+        unknown = set(fields) - set(TEXT_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown text fields: {sorted(unknown)}")
+        match = _match(query, fields)
+        if not match:
+            return []
+        # Rank the matches by themselves first, so only the returned ones are joined to their entries
+        sql = "SELECT rowid, rank FROM entry_text WHERE entry_text MATCH ?"
+        params: list = [match]
+        if source is not None:
+            sql += " AND rowid IN (SELECT docid FROM indexed WHERE source = ?)"
+            params.append(source)
+        sql += " ORDER BY rank"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        sql = ("SELECT entries.source, entries.data FROM (" + sql + ") AS hits"
+               " JOIN indexed ON indexed.docid = hits.rowid"
+               " JOIN entries ON entries.source = indexed.source AND entries.word = indexed.word"
+               " ORDER BY hits.rank")
+        return [(source, json.loads(data)) for source, data in self.conn.execute(sql, params)]
+
+    def put_many(self, source: str, entries: Iterable[dict],
+                 validators: dict[str, tuple[str | None, str | None]] | None = None) -> None:
+        '''Stores to_dict() entries, stamped with the current parser version and their page's (etag, last_modified)'''
+        version = SOURCES[source].PARSER_VERSION
+        now = time.time()
+        validators = validators or {}
+        rows, texts = [], []
+        for entry in entries:
+            word = normalize_word(entry["target_word"], source)
+            etag, last_modified = validators.get(word, (None, None))
+            rows.append((source, word, version, now, json.dumps(entry, ensure_ascii=False), etag, last_modified))
+            texts.append((source, word, entry))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO entries (source, word, parser_version, updated_at, data, etag, last_modified)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._index(texts)
+
+    def put(self, source: str, entry: dict) -> None:
+        self.put_many(source, [entry])
+
+    def touch(self, source: str, words: Iterable[str]) -> None:
+        '''Marks rows as current again without changing their data (their page was revalidated)'''
+        with self.conn:
+            self.conn.execute(
+                "UPDATE entries SET updated_at = ? WHERE source = ? AND word IN (SELECT value FROM json_each(?))",
+                (time.time(), source, json.dumps(sorted({normalize_word(word, source) for word in words}))),
+            )
+
+    def lookup(self, source: str, words: Iterable[str], fetcher: Fetcher | None = None) -> dict[str, dict]:
+        """
+        Returns entries for words keyed by the words as given, extracting only those that are
+        missing, stale or stamped with an older parser version. A stale row with the current
+        parser version is revalidated first and kept as-is when its page returns 304.
+        Words without a definition are left out.
+        """
+        words = list(words)
+        fetcher = fetcher or default_fetcher()
+        found, stale = {}, {}
+        for word, version, updated_at, data, etag, last_modified in self._rows(source, words):
+            if self._current(source, version, updated_at):
+                found[word] = json.loads(data)
+            elif version == SOURCES[source].PARSER_VERSION and (etag or last_modified):
+                stale[word] = (json.loads(data), etag, last_modified)
+        entry_cls = SOURCES[source]
+        extracted, validators, revalidated = [], {}, []
+        for word in words:
+            key = normalize_word(word, source)
+            if key in found:
+                continue
+            data, etag, last_modified = stale.get(key, (None, None, None))
+            try:
+                result = fetcher.fetch_result(source, word, etag, last_modified)
+                if result.not_modified and data is not None:
+                    found[key] = data
+                    revalidated.append(key)
+                    continue
+                if result.body is None:
+                    # 304 with nothing to reuse; fetch the page itself
+                    result = fetcher.fetch_result(source, word)
+                entry = entry_cls(word, html=result.body).to_dict()
+            except DefinitionNotFoundError:
+                continue
+            found[key] = entry
+            extracted.append(entry)
+            validators[key] = (result.etag, result.last_modified)
+        if revalidated:
+            self.touch(source, revalidated)
+        if extracted:
+            self.put_many(source, extracted, validators)
+        return {word: found[normalize_word(word, source)] for word in words if normalize_word(word, source) in found}
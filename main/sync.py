@@ -0,0 +1,136 @@
+"""
+Incremental deck sync: writes an .apkg holding only the notes that are new or changed
+compared to an existing Anki collection, so a weekly update costs time in proportion to the
+words added rather than the size of the deck.
+
+Notes are matched by note_guid(word), and importing the package into Anki adds the new
+notes and updates the changed ones in place.
+
+Usage: python -m main.sync collection.anki2 words.txt update.apkg --source wiktionnaire
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+
+from .anki import MODEL_NAME, ApkgWriter, note_fields, note_guid
+from .cache import DiskCache
+from .cli import read_words
+from .fetch import Fetcher
+from .lib import SOURCES
+from .pipeline import Pipeline
+from .scheduler import BULK, default_scheduler
+
+def fields_hash(fields: list[str]) -> bytes:
+    '''Content hash of a note's fields, as stored in the flds column'''
+    return hashlib.sha1("\x1f".join(fields).encode()).digest()[:8]
+
+@dataclass
+class SyncStats:
+    added: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    # skipped words were already in the deck and were not looked up again
+    skipped: int = 0
+    not_found: int = 0
+
+class CollectionIndex:
+    """
+    The AnkiVocab notes of a collection.anki2, as note guid -> hash of their fields.
+    The collection is opened read-only, so it is safe to index while Anki has it open.
+    """
+
+    def __init__(self, path: str, deck_name: str = "AnkiVocab"):
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            if "notetypes" in tables:
+                # Schema 18 and later keep note types and decks in their own tables
+                mids = [mid for (mid,) in conn.execute("SELECT id FROM notetypes WHERE name = ?", (MODEL_NAME,))]
+                dids = [did for (did,) in conn.execute("SELECT id FROM decks WHERE name = ?", (deck_name,))]
+            else:
+                models, decks = conn.execute("SELECT models, decks FROM col").fetchone()
+                mids = [int(mid) for mid, model in json.loads(models).items() if model["name"] == MODEL_NAME]
+                dids = [int(did) for did, deck in json.loads(decks).items() if deck["name"] == deck_name]
+            self.mid = mids[0] if mids else None
+            self.did = dids[0] if dids else None
+            self.notes: dict[str, bytes] = {}
+            if self.mid is not None:
+                for guid, flds in conn.execute("SELECT guid, flds FROM notes WHERE mid = ?", (self.mid,)):
+                    self.notes[guid] = fields_hash(flds.split("\x1f"))
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        return len(self.notes)
+
+    def __contains__(self, word: str) -> bool:
+        return note_guid(word) in self.notes
+
+    def changed(self, word: str, fields: list[str]) -> bool:
+        return self.notes.get(note_guid(word)) != fields_hash(fields)
+
+def sync(collection: str, words: Iterable[str], path: str, source: str = "wordreference",
+         pipeline: Pipeline | None = None, deck_name: str = "AnkiVocab", refresh: bool = False,
+         media_for: Callable[[dict], Iterable[str]] | None = None) -> SyncStats:
+    """
+    Writes the notes of words that are missing from the collection, or whose content changed,
+    to an .apkg at path. Words already in the deck are not looked up unless refresh is set,
+    in which case they are looked up again and only written if their fields differ.
+    media_for should be the same as for the original export, since it is part of the fields.
+    """
+    index = CollectionIndex(collection, deck_name)
+    stats = SyncStats()
+    pipeline = pipeline or Pipeline(source)
+
+    def pending() -> Iterator[str]:
+        seen = set()
+        for word in words:
+            if word in seen:
+                continue
+            seen.add(word)
+            if word in index and not refresh:
+                stats.skipped += 1
+                continue
+            yield word
+
+    with ApkgWriter(path, deck_name, mid=index.mid, did=index.did) as writer:
+        for result in pipeline.run(pending()):
+            if result.error is not None:
+                stats.not_found += 1
+                continue
+            media = list(media_for(result.data)) if media_for else []
+            fields = note_fields(result.data, [os.path.basename(file) for file in media])
+            if result.word not in index:
+                stats.added += 1
+            elif index.changed(result.word, fields):
+                stats.updated += 1
+            else:
+                stats.unchanged += 1
+                continue
+            writer.add(result.data, media)
+    return stats
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("collection", help="the collection.anki2 of the Anki profile")
+    parser.add_argument("words", help="word list, one word per line")
+    parser.add_argument("output", help=".apkg to write the new and changed notes to")
+    parser.add_argument("--source", default="wordreference", choices=list(SOURCES))
+    parser.add_argument("--deck", default="AnkiVocab")
+    parser.add_argument("--refresh", action="store_true", help="look up words already in the deck again")
+    parser.add_argument("--cache", help="directory to cache fetched pages in")
+    args = parser.parse_args()
+
+    fetcher = Fetcher(cache=DiskCache(args.cache) if args.cache else None, scheduler=default_scheduler(), priority=BULK)
+    with open(args.words, encoding="utf-8") as f:
+        stats = sync(args.collection, read_words(f), args.output, args.source,
+                     Pipeline(args.source, fetcher), args.deck, args.refresh)
+    print(f"{stats.added} added, {stats.updated} updated, {stats.unchanged} unchanged, "
+          f"{stats.skipped} already in the deck, {stats.not_found} not found")
+
+if __name__ == "__main__":
+    main()
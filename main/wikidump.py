@@ -0,0 +1,253 @@
+"""
+Builds a local index of French Wiktionnaire entries from a frwiktionary XML dump,
+so that Wiktionnaire lookups can be answered without the network.
+
+The dump is read as a stream with constant memory; the French sections are extracted
+from the wikitext on a pool of worker processes.
+
+Usage: python -m main.wikidump frwiktionary-latest-pages-articles.xml.bz2 wiktionnaire.db
+"""
+import argparse
+import bz2
+import hashlib
+import json
+import multiprocessing
+import re
+import sqlite3
+import time
+import unicodedata
+import xml.etree.ElementTree as ET
+from collections.abc import Iterable, Iterator
+from itertools import islice
+
+# Gender templates on a "ligne de forme", with the abbreviations Wiktionnaire.get_genders uses
+_GENDER_TEMPLATES = {
+    "m": "(nm)",
+    "f": "(nf)",
+    "mf": "(nmf)",
+}
+_LANGUAGE_HEADING = re.compile(r"^==\s*\{\{langue\|([^}|]+)\}\}\s*==\s*$", re.M)
+_LEVEL2_HEADING = re.compile(r"^==[^=]", re.M)
+_LINK = re.compile(r"\[\[(?:[^|\]]*\|)?([^\]]*)\]\]")
+_REF = re.compile(r"<ref[^>/]*/>|<ref[^>]*>.*?</ref>|<!--.*?-->", re.S)
+_TAG = re.compile(r"<[^>]+>")
+
+def _split_params(inner: str) -> list[str]:
+    '''Splits the inside of a template on the | separators that are not nested in {{ }} or [[ ]]'''
+    parts, depth, start = [], 0, 0
+    i = 0
+    while i < len(inner):
+        pair = inner[i:i + 2]
+        if pair in ("{{", "[["):
+            depth += 1
+            i += 2
+            continue
+        if pair in ("}}", "]]"):
+            depth -= 1
+            i += 2
+            continue
+        if inner[i] == "|" and depth == 0:
+            parts.append(inner[start:i])
+            start = i + 1
+        i += 1
+    parts.append(inner[start:])
+    return parts
+
+def templates(text: str) -> Iterator[tuple[int, int, str, list[str], dict[str, str]]]:
+    '''Yields (start, end, name, positional params, named params) for each top-level {{template}} in text'''
+    i = 0
+    while True:
+        start = text.find("{{", i)
+        if start < 0:
+            return
+        depth, j = 0, start
+        while j < len(text):
+            if text.startswith("{{", j):
+                depth += 1
+                j += 2
+            elif text.startswith("}}", j):
+                depth -= 1
+                j += 2
+                if depth == 0:
+                    break
+            else:
+                j += 1
+        if depth != 0:
+            return
+        name, *params = _split_params(text[start + 2:j - 2])
+        positional, named = [], {}
+        for param in params:
+            key, sep, value = param.partition("=")
+            if sep and "{{" not in key and "[[" not in key:
+                named[key.strip()] = value.strip()
+            else:
+                positional.append(param.strip())
+        yield start, j, name.strip(), positional, named
+        i = j
+
+def _render_template(name: str, positional: list[str], named: dict[str, str]) -> str:
+    '''Renders the templates that show up in definitions and examples as plain text'''
+    if name == "exemple":
+        return render(positional[0]) if positional else ""
+    if name in ("w", "lien", "l", "nom w pc"):
+        return render(positional[0]) if positional else ""
+    if name == "term":
+        return f"({render(positional[0])})" if positional else ""
+    if name == "lexique":
+        labels = [render(p) for p in positional if p != "fr"]
+        return f"({', '.join(label.capitalize() for label in labels)})" if labels else ""
+    if name in ("pron", "phon"):
+        return f"\\{positional[0]}\\" if positional else ""
+    # Usage labels such as {{familier|fr}} render as "(Familier)"
+    if positional == ["fr"] and not named:
+        return f"({name.capitalize()})"
+    return ""
+
+def render(wikitext: str) -> str:
+    '''Turns a line of wikitext into plain text'''
+    text = _REF.sub("", wikitext)
+    out, last = [], 0
+    for start, end, name, positional, named in templates(text):
+        out.append(text[last:start])
+        out.append(_render_template(name, positional, named))
+        last = end
+    out.append(text[last:])
+    text = _LINK.sub(r"\1", "".join(out))
+    text = _TAG.sub("", text.replace("'''", "").replace("''", ""))
+    return " ".join(text.split())
+
+def commons_audio(file: str) -> str:
+    '''The upload.wikimedia.org link of a Commons file, in the form Wiktionnaire.get_audio returns'''
+    name = file.strip().replace(" ", "_")
+    digest = hashlib.md5(name.encode()).hexdigest()
+    return f"upload.wikimedia.org/wikipedia/commons/{digest[0]}/{digest[:2]}/{name}"
+
+def french_section(wikitext: str) -> str | None:
+    '''Returns the {{langue|fr}} section of a page, or None if there is none'''
+    for match in _LANGUAGE_HEADING.finditer(wikitext):
+        if match.group(1).strip() == "fr":
+            end = _LEVEL2_HEADING.search(wikitext, match.end())
+            return wikitext[match.end():end.start() if end else len(wikitext)]
+    return None
+
+def extract_french(section: str) -> dict:
+    """
+    Extracts what Wiktionnaire's getters read from the wikitext of a French section:
+    pronunciations and genders from each ligne de forme, the definitions and examples
+    of each gendered word group, and the audio files.
+    """
+    pronunciations, genders, groups, audio = [], [], [], []
+    group = None
+    for line in section.splitlines():
+        for _, _, name, positional, named in templates(line):
+            if name == "écouter" and named.get("audio"):
+                link = commons_audio(named["audio"])
+                if link not in audio:
+                    audio.append(link)
+        if line.startswith("'''"):
+            # A ligne de forme starts a new word group if it carries a new gender
+            group = None
+            for _, _, name, positional, named in templates(line):
+                if name in ("pron", "phon") and positional and positional[0] and positional[0] not in pronunciations:
+                    pronunciations.append(positional[0])
+                if name in _GENDER_TEMPLATES and group is None and _GENDER_TEMPLATES[name] not in genders:
+                    genders.append(_GENDER_TEMPLATES[name])
+                    group = {"gender": _GENDER_TEMPLATES[name], "definitions": [], "examples": []}
+                    groups.append(group)
+        elif line.startswith("="):
+            group = None
+        elif line.startswith("#") and group is not None:
+            marker = re.match(r"#[#*:]*", line).group()
+            text = render(line[len(marker):])
+            if not text:
+                continue
+            if marker.endswith("*"):
+                group["examples"].append(text)
+            elif ":" not in marker and "*" not in marker:
+                group["definitions"].append(text)
+    return {"pronunciations": pronunciations, "genders": genders, "groups": groups, "audio": audio}
+
+def extract_page(page: tuple[str, str]) -> tuple[str, dict | None]:
+    '''Worker entry point: extracts the French entry of one (title, wikitext) page'''
+    title, wikitext = page
+    section = french_section(wikitext)
+    return title, extract_french(section) if section is not None else None
+
+def iter_pages(path: str) -> Iterator[tuple[str, str]]:
+    '''Streams (title, wikitext) of main-namespace pages with a French section out of a (bz2) XML dump'''
+    opener = bz2.open if path.endswith(".bz2") else open
+    with opener(path, "rb") as f:
+        context = ET.iterparse(f, events=("start", "end"))
+        _, root = next(context)
+        title = ns = text = None
+        for event, elem in context:
+            if event != "end":
+                continue
+            tag = elem.tag.rsplit("}", 1)[-1]
+            if tag == "title":
+                title = elem.text
+            elif tag == "ns":
+                ns = elem.text
+            elif tag == "text":
+                text = elem.text or ""
+            elif tag == "page":
+                if ns == "0" and title and "{{langue|fr}}" in text:
+                    yield title, text
+                title = ns = text = None
+                # Drop finished pages so memory stays constant
+                root.clear()
+
+class DumpIndex:
+    """SQLite index of French entries extracted from a Wiktionnaire dump, keyed by page title."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS entries (word TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        self.conn.commit()
+
+    def get(self, word: str) -> dict | None:
+        '''Returns the extracted entry for a word, or None if the dump has no French entry for it'''
+        row = self.conn.execute("SELECT data FROM entries WHERE word = ?",
+                                (unicodedata.normalize("NFC", word),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def __contains__(self, word: str) -> bool:
+        return self.get(word) is not None
+
+    def put_many(self, entries: Iterable[tuple[str, dict]]) -> None:
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO entries (word, data) VALUES (?, ?)",
+                                  ((unicodedata.normalize("NFC", word), json.dumps(data, ensure_ascii=False))
+                                   for word, data in entries))
+
+    def close(self) -> None:
+        self.conn.close()
+
+def build_index(dump: str, index: DumpIndex, workers: int | None = None, batch_size: int = 2000) -> int:
+    '''Extracts every French entry of a dump into the index using a process pool; returns the entry count'''
+    count = 0
+    pages = iter_pages(dump)
+    with multiprocessing.Pool(workers) as pool:
+        # Feed the pool one batch at a time so the reader can't run ahead of the workers
+        while batch := list(islice(pages, batch_size)):
+            entries = [(title, data) for title, data in pool.imap(extract_page, batch, chunksize=64) if data]
+            index.put_many(entries)
+            count += len(entries)
+    return count
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("dump", help="frwiktionary-*-pages-articles.xml(.bz2)")
+    parser.add_argument("index", help="SQLite index file to write")
+    parser.add_argument("--workers", type=int, help="extraction processes (default: one per core)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = DumpIndex(args.index)
+    count = build_index(args.dump, index, args.workers)
+    index.close()
+    print(f"Indexed {count} French entries in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
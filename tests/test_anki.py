@@ -0,0 +1,53 @@
+import json
+import sqlite3
+import zipfile
+
+from main.anki import MODEL_NAME, export_apkg, note_guid
+
+ENTRIES = [
+    {"target_word": "chat", "definitions": {"chat (nm)": "1. cat"}, "pronunciations": "/ʃa/",
+     "examples": ["Le chat dort."]},
+    {"target_word": "chien", "definitions": {"chien (nm)": "1. dog"}, "pronunciations": "/ʃjɛ̃/", "examples": []},
+    {"target_word": "mot", "definitions": "", "examples": []},
+]
+
+def read_package(path: str, tmp_path) -> tuple[sqlite3.Connection, dict, dict[str, bytes]]:
+    '''Returns the package's collection, its media mapping and the media files by numbered entry'''
+    with zipfile.ZipFile(path) as package:
+        package.extract("collection.anki2", tmp_path)
+        mapping = json.loads(package.read("media"))
+        files = {idx: package.read(idx) for idx in mapping}
+    return sqlite3.connect(tmp_path / "collection.anki2"), mapping, files
+
+def test_export_apkg(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    media = {"chat": [tmp_path / "a" / "chat.mp3"], "chien": [tmp_path / "a" / "chien.mp3", tmp_path / "b" / "chien.mp3"]}
+    for files in media.values():
+        for file in files:
+            file.write_bytes(str(file).encode())
+
+    path = str(tmp_path / "deck.apkg")
+    count = export_apkg(iter(ENTRIES), path, "Français", media_for=lambda entry: map(str, media.get(entry["target_word"], [])),
+                        batch_size=2)
+    assert count == 3
+    conn, mapping, files = read_package(path, tmp_path)
+
+    models, decks = conn.execute("SELECT models, decks FROM col").fetchone()
+    (mid, model), = json.loads(models).items()
+    assert model["name"] == MODEL_NAME
+    did = next(int(did) for did, deck in json.loads(decks).items() if deck["name"] == "Français")
+    notes = conn.execute("SELECT id, guid, mid, flds, sfld FROM notes ORDER BY id").fetchall()
+    assert [guid for _, guid, _, _, _ in notes] == [note_guid(entry["target_word"]) for entry in ENTRIES]
+    assert all(note_mid == int(mid) for _, _, note_mid, _, _ in notes)
+    word, definitions, pronunciation, examples, audio = notes[0][3].split("\x1f")
+    assert (word, pronunciation, examples, audio) == ("chat", "/ʃa/", "Le chat dort.", "[sound:chat.mp3]")
+    assert notes[1][3].split("\x1f")[4] == "[sound:chien.mp3][sound:chien-2.mp3]"
+    cards = conn.execute("SELECT nid, did FROM cards ORDER BY nid").fetchall()
+    assert cards == [(nid, did) for nid, _, _, _, _ in notes]
+    conn.close()
+
+    # Two files with the same name are kept apart
+    assert sorted(mapping.values()) == ["chat.mp3", "chien-2.mp3", "chien.mp3"]
+    names = {name: idx for idx, name in mapping.items()}
+    assert files[names["chien-2.mp3"]] == str(media["chien"][1]).encode()
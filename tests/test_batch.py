@@ -0,0 +1,20 @@
+import asyncio
+
+from main.batch import lookup_many
+from main.bench import PageServer, synthetic_wordreference
+from main.fetch import Fetcher
+
+def collect(words, **kwargs) -> dict:
+    async def run():
+        return {result.word: result async for result in lookup_many(words, **kwargs)}
+    return asyncio.run(run())
+
+def test_errors_are_per_word():
+    # An external <script src=...> has no string, which get_audio doesn't expect
+    bad = synthetic_wordreference("bad").replace(b'<div id="articleHead">',
+                                                   b'<div id="articleHead"><script src="/ads.js"></script>')
+    pages = {"wordreference": {"bad": bad, "mot": synthetic_wordreference("mot")}}
+    with PageServer(pages) as server:
+        results = collect(["bad", "mot"], fetcher=Fetcher(urls=server.urls))
+    assert results["bad"].data is None and results["bad"].error is not None
+    assert results["mot"].data["target_word"] == "mot"
@@ -0,0 +1,37 @@
+import pytest
+
+from main.cache import CachedResponse, DiskCache, ResponseCache, normalize_word
+
+def test_normalize_word():
+    assert normalize_word(" Pomme ") == "pomme"
+    assert normalize_word("élève") == "élève"
+    # Wiktionnaire titles are case-sensitive
+    assert normalize_word(" Paris ", "wiktionnaire") == "Paris"
+    assert normalize_word("Paris", "wiktionnaire#Français") == "Paris"
+
+def test_keys_follow_source_case(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.set("wiktionnaire", "Paris", b"city")
+    cache.set("wordreference", "Pomme", b"fruit")
+    assert cache.get("wiktionnaire", "Paris") == b"city"
+    assert cache.get("wiktionnaire", "paris") is None
+    assert cache.get("wordreference", "pomme") == b"fruit"
+
+def test_response_cache_interface():
+    with pytest.raises(TypeError):
+        ResponseCache()
+
+    class MemoryCache(ResponseCache):
+        def __init__(self):
+            self.bodies = {}
+
+        def get(self, source, word):
+            return self.bodies.get((source, normalize_word(word, source)))
+
+        def set(self, source, word, body, etag=None, last_modified=None):
+            self.bodies[(source, normalize_word(word, source))] = body
+
+    cache = MemoryCache()
+    cache.set("wordreference", "mot", b"page")
+    assert cache.lookup("wordreference", "MOT") == CachedResponse(b"page")
+    assert cache.lookup("wordreference", "chat") is None
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from main.bench import PageServer, synthetic_wordreference
+from main.cli import load_checkpoint, run
+from main.fetch import Fetcher
+from main.pipeline import Pipeline
+
+WORDS = [f"mot{i}" for i in range(12)]
+
+@pytest.fixture
+def pipeline():
+    with PageServer({"wordreference": {"mot0": synthetic_wordreference("mot0")}}) as server:
+        yield Pipeline("wordreference", Fetcher(urls=server.urls), parse_workers=1,
+                       max_pending=2, fields=["pronunciations"])
+
+def killed_after(words: list[str], count: int):
+    '''Yields words, then interrupts the run as Ctrl-C or a SIGTERM would'''
+    yield from words[:count]
+    raise KeyboardInterrupt
+
+def test_resume_after_kill(pipeline, tmp_path):
+    output, checkpoint = str(tmp_path / "out.jsonl"), str(tmp_path / "out.checkpoint")
+    with pytest.raises(KeyboardInterrupt):
+        run(killed_after(WORDS, 7), output, checkpoint, pipeline, every=3)
+    assert 0 < load_checkpoint(checkpoint)["words"] <= 7
+    run(iter(WORDS), output, checkpoint, pipeline, every=3)
+    with open(output, encoding="utf-8") as f:
+        assert [json.loads(line)["target_word"] for line in f] == WORDS
+    assert load_checkpoint(checkpoint)["words"] == len(WORDS)
+
+def test_new_run_appends(pipeline, tmp_path):
+    output = tmp_path / "out.jsonl"
+    output.write_text('{"target_word": "old"}\n')
+    run(iter(WORDS[:2]), str(output), str(tmp_path / "out.checkpoint"), pipeline)
+    assert [json.loads(line)["target_word"] for line in output.read_text().splitlines()] == ["old", *WORDS[:2]]
+
+def test_refuses_to_resume_onto_a_shorter_output(pipeline, tmp_path):
+    output, checkpoint = tmp_path / "out.jsonl", str(tmp_path / "out.checkpoint")
+    run(iter(WORDS[:3]), str(output), checkpoint, pipeline)
+    output.unlink()
+    with pytest.raises(SystemExit):
+        run(iter(WORDS), str(output), checkpoint, pipeline)
+    assert not output.exists()
@@ -0,0 +1,27 @@
+import pytest
+
+from main.bench import synthetic_wiktionnaire, synthetic_wordreference
+from main.compare_parsers import extract, load_pages
+from main.parsing import BACKENDS, DEFAULT_BACKEND, backend_available
+
+PAGES = [
+    ("wordreference", "mot", synthetic_wordreference("mot")),
+    ("wordreference", "vide", b"<html><body><div id='articleHead'></div></body></html>"),
+    ("wiktionnaire", "chat", synthetic_wiktionnaire("chat")),
+    ("wiktionnaire", "a", synthetic_wiktionnaire("a", multilingual=True)),
+]
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+def test_backends_match_default(backend):
+    if not backend_available(backend):
+        pytest.skip(f"the {BACKENDS[backend][0]} tree builder isn't installed")
+    for source, word, html in PAGES:
+        assert extract(source, word, html, backend) == extract(source, word, html, DEFAULT_BACKEND)
+
+def test_load_pages(tmp_path):
+    for source, word, html in PAGES:
+        (tmp_path / source).mkdir(exist_ok=True)
+        (tmp_path / source / f"{word}.html").write_bytes(html)
+    (tmp_path / "notes").mkdir()
+    (tmp_path / "wordreference" / "README.txt").write_text("not a page")
+    assert load_pages(str(tmp_path)) == sorted(PAGES, key=lambda page: (page[0], page[1]))
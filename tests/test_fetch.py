@@ -0,0 +1,102 @@
+import json
+
+import pytest
+import requests
+
+from main.bench import PageServer, synthetic_wiktionnaire, synthetic_wordreference
+from main.cache import DiskCache
+from main.errors import DefinitionNotFoundError
+from main.fetch import Fetcher, parse_query
+from main.lib import Wiktionnaire
+
+@pytest.fixture
+def pages_server():
+    with PageServer({"wordreference": {"mot": synthetic_wordreference("mot")}}) as server:
+        yield server
+
+def test_retries_transient_errors(pages_server):
+    fetcher = Fetcher(urls=pages_server.urls, retries=2, backoff=0)
+    pages_server.fail_next = 2
+    assert fetcher.fetch("wordreference", "mot") == synthetic_wordreference("mot")
+    assert fetcher.stats()["retries"] == 2
+    assert pages_server.requests == 3
+
+def test_gives_up_after_retries(pages_server):
+    fetcher = Fetcher(urls=pages_server.urls, retries=1, backoff=0)
+    pages_server.fail_next = 2
+    with pytest.raises(requests.HTTPError):
+        fetcher.fetch("wordreference", "mot")
+
+def test_revalidates_stale_pages(pages_server, tmp_path):
+    # A negative TTL makes every cached page stale, so each fetch revalidates it
+    fetcher = Fetcher(urls=pages_server.urls, cache=DiskCache(str(tmp_path), ttl=-1))
+    body = fetcher.fetch_result("wordreference", "mot").body
+    result = fetcher.fetch_result("wordreference", "mot")
+    assert result.not_modified and result.from_cache and result.body == body
+    assert pages_server.not_modified == 1
+    assert fetcher.stats()["bytes_saved"] == len(body)
+
+def test_revalidates_caller_validators(pages_server):
+    fetcher = Fetcher(urls=pages_server.urls)
+    first = fetcher.fetch_result("wordreference", "mot")
+    result = fetcher.fetch_result("wordreference", "mot", etag=first.etag)
+    # Nothing cached to hand back: the caller's own copy is current
+    assert result.not_modified and result.body is None
+
+def test_error_statuses_never_reach_parsers(pages_server):
+    fetcher = Fetcher(urls=pages_server.urls)
+    assert fetcher.timeout is not None
+    with pytest.raises(DefinitionNotFoundError):
+        fetcher.fetch("wiktionnaire", "mot")
+    pages_server.fail_next, pages_server.fail_status = 1, 403
+    with pytest.raises(requests.HTTPError):
+        fetcher.fetch("wordreference", "mot")
+
+def french_section(word: str) -> str:
+    '''The Français section of a synthetic page, as the parse API renders it'''
+    html = synthetic_wiktionnaire(word).decode()
+    return html[html.index('<div class="mw-content-ltr'):html.rindex("</body>")]
+
+def toc_entry(index: int, anchor: str, line: str) -> dict:
+    # Shaped like the API's sections: line is the heading's TOC HTML, anchor its plain id
+    return {"toclevel": 1, "level": "2", "line": line, "number": str(index), "index": str(index),
+            "fromtitle": "x", "byteoffset": 0, "anchor": anchor, "linkAnchor": anchor}
+
+FRENCH = toc_entry(1, "Français", '<span class="sectionlangue" id="fr">Français</span>')
+TRANSLINGUAL = toc_entry(1, "Conventions_internationales",
+                         '<span class="sectionlangue" id="conv">Conventions internationales</span>')
+
+def api_responses() -> dict[str, bytes]:
+    responses = {
+        # Français is the first section
+        parse_query("chat", "text|sections", 1): {"parse": {"title": "chat", "text": french_section("chat"),
+                                                            "sections": [FRENCH]}},
+        # Français comes after another language
+        parse_query("a", "text|sections", 1): {"parse": {"title": "a", "text": "<div></div>",
+                                                         "sections": [TRANSLINGUAL]}},
+        parse_query("a", "sections"): {"parse": {"title": "a", "sections": [
+            TRANSLINGUAL, toc_entry(3, "Français", FRENCH["line"])]}},
+        parse_query("a", "text", 3): {"parse": {"title": "a", "text": french_section("a")}},
+        parse_query("zzz", "text|sections", 1): {"error": {"code": "missingtitle",
+                                                           "info": "The page you specified doesn't exist."}},
+    }
+    return {query: json.dumps(response).encode() for query, response in responses.items()}
+
+@pytest.fixture
+def server():
+    # The full page of "a" has other languages around its Français section
+    pages = {"wiktionnaire": {"chat": synthetic_wiktionnaire("chat"),
+                              "a": synthetic_wiktionnaire("a", multilingual=True)}}
+    with PageServer(pages, {"wiktionnaire": api_responses()}) as server:
+        yield server
+
+def test_fetch_section_matches_full_page(server):
+    fetcher = Fetcher(urls=server.urls, api_urls=server.api_urls)
+    for word in ("chat", "a"):
+        full = Wiktionnaire(word, fetcher=fetcher).to_dict()
+        assert Wiktionnaire(word, fetcher=fetcher, api=True).to_dict() == full
+
+def test_fetch_section_missing_page(server):
+    fetcher = Fetcher(api_urls=server.api_urls)
+    with pytest.raises(DefinitionNotFoundError):
+        fetcher.fetch_section("wiktionnaire", "zzz", Wiktionnaire.HEADING)
@@ -0,0 +1,73 @@
+import asyncio
+
+from main.batch import lookup_many
+from main.bench import PageServer, synthetic_wordreference
+from main.fetch import Fetcher
+from main.lemmas import LemmaIndex
+
+def collect(words, **kwargs) -> dict:
+    async def run():
+        return {result.word: result async for result in lookup_many(words, **kwargs)}
+    return asyncio.run(run())
+
+def test_compact_writes_a_sorted_index(tmp_path):
+    path = str(tmp_path / "lemmas.idx")
+    index = LemmaIndex(path)
+    index.add_inflections("Mangea", {"manger": ["passé simple"]})
+    index.add_inflections("eusse", {"avoir": ["subjonctif imparfait"]})
+    index.add_inflections("été", {"être": ["participe passé"], "été": ["nom"]})
+    index.add_inflections("suis", {"être": ["présent"], "suivre": ["présent"]})
+    index.compact()
+    assert open(path, "rb").read(8) == b"AVLEMMA1"
+    assert open(index.log_path).read() == ""
+    forms = [inflection.form.encode() for inflection in index._records]
+    assert forms == sorted(forms) and len(index) == 5
+    index.close()
+
+    index = LemmaIndex(path)
+    assert index.resolve("mangea") == "manger"
+    assert index.resolve("ÉTÉ") == "être"
+    # Ambiguous and unknown forms stay as they are
+    assert index.resolve("suis") == "suis"
+    assert index.resolve("mot") == "mot"
+    assert [i.description for i in index.lookup("eusse")] == ["subjonctif imparfait"]
+    index.close()
+
+def test_log_is_replayed(tmp_path):
+    path = str(tmp_path / "lemmas.idx")
+    index = LemmaIndex(path)
+    index.add_inflections("eusse", {"avoir": ["subjonctif imparfait"]})
+    index.compact()
+    index.add_inflections("mangea", {"manger": ["passé simple"]})
+    index.close()
+
+    index = LemmaIndex(path)
+    assert len(index) == 2
+    assert index.resolve("mangea") == "manger" and index.resolve("eusse") == "avoir"
+    index.compact()
+    assert len(index._pending) == 0 and index.resolve("mangea") == "manger"
+    index.close()
+
+# A page that only lists the word as an inflection of another
+INFLECTION_ONLY = (
+    '<html><body><div id="articleHead"><h3>mangea</h3></div>'
+    '<div id="articleWRD"><table class="WRD"></table><div class="otherWRD">manger</div></div>'
+    '<div class="inflectionsSection"><dl><dt><a href="/conj/">manger</a></dt><dt><b>mangea</b></dt>'
+    '<dd>indicatif passé simple</dd></dl></div></body></html>'
+).encode()
+
+def test_lookup_many_indexes_inflection_only_pages(tmp_path):
+    index = LemmaIndex(str(tmp_path / "lemmas.idx"))
+    pages = {"wordreference": {"mot0": synthetic_wordreference("mot0"), "mangea": INFLECTION_ONLY,
+                               "manger": synthetic_wordreference("manger")}}
+    with PageServer(pages) as server:
+        fetcher = Fetcher(urls=server.urls)
+        results = collect(["mot0", "mangea"], fetcher=fetcher, lemmas=index)
+        assert results["mangea"].data["definitions"] == ""
+        # mot0 has definitions of its own, so its inflections list doesn't make it a form of "mot0r"
+        assert index.resolve("mot0") == "mot0"
+        assert index.resolve("mangea") == "manger"
+        # Known forms are fetched as their lemma
+        results = collect(["mangea"], fetcher=fetcher, lemmas=index)
+        assert results["mangea"].data["target_word"] == "manger"
+    index.close()
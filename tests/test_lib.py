@@ -0,0 +1,37 @@
+import pytest
+
+from main.bench import PageServer, synthetic_wiktionnaire, synthetic_wordreference
+from main.fetch import Fetcher
+from main.lib import SOURCES
+
+def wordreference_between(word: str) -> bytes:
+    '''A WordReference page with more sections between the article and its inflections'''
+    return synthetic_wordreference(word).replace(
+        b'<div class="inflectionsSection">',
+        b'<div class="wrapper"><div class="otherWRD">Formes</div></div><div class="inflectionsSection">')
+
+PAGES = {
+    "wordreference": {"mot": synthetic_wordreference("mot"), "entre": wordreference_between("entre")},
+    "wiktionnaire": {"mot": synthetic_wiktionnaire("mot"),
+                     "chat": synthetic_wiktionnaire("chat", multilingual=True)},
+}
+
+@pytest.mark.parametrize("source, word", [(source, word) for source, pages in PAGES.items() for word in pages])
+def test_stream_matches_full_page(source, word):
+    entry_cls = SOURCES[source]
+    html = PAGES[source][word]
+    full = entry_cls(word, html=html).to_dict()
+    assert entry_cls(word, html=html, stream=True).to_dict() == full
+    with PageServer(PAGES) as server:
+        assert entry_cls(word, fetcher=Fetcher(urls=server.urls), stream=True).to_dict() == full
+
+def test_stream_keeps_inflections():
+    html = wordreference_between("entre")
+    assert SOURCES["wordreference"]("entre", html=html, stream=True).get_inflections() == {
+        "entrer": ["indicatif présent"]}
+
+def test_only_the_french_section_is_read():
+    html = synthetic_wiktionnaire("chat", multilingual=True)
+    entry = SOURCES["wiktionnaire"]("chat", html=html)
+    assert entry.to_dict() == SOURCES["wiktionnaire"]("chat", html=synthetic_wiktionnaire("chat")).to_dict()
+    assert entry.get_pronunciations() == ["chat"]
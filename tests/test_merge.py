@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+from main.bench import PageServer, synthetic_wiktionnaire, synthetic_wordreference
+from main.errors import DefinitionNotFoundError
+from main.fetch import Fetcher
+from main.merge import merged_lookup
+from main.scheduler import Scheduler
+
+PAGES = {"wordreference": {"mot": synthetic_wordreference("mot")},
+         "wiktionnaire": {"mot": synthetic_wiktionnaire("mot")}}
+
+def slowed(fetcher: Fetcher, source: str, delay: float, times: int = 1_000_000) -> Fetcher:
+    '''Makes the first `times` requests for a source take `delay` seconds longer'''
+    get, lock, slowed = fetcher.session.get, threading.Lock(), [0]
+    def slow_get(url, *args, **kwargs):
+        with lock:
+            slow = f"/{source}/" in url and slowed[0] < times
+            slowed[0] += slow
+        if slow:
+            time.sleep(delay)
+        return get(url, *args, **kwargs)
+    fetcher.session.get = slow_get
+    return fetcher
+
+@pytest.fixture
+def server():
+    with PageServer(PAGES) as server:
+        yield server
+
+def test_both_sources(server):
+    card = merged_lookup("mot", fetcher=Fetcher(urls=server.urls))
+    assert card["missing"] == {}
+    assert isinstance(card["examples"], list) and card["examples"]
+    assert isinstance(card["examples_fr"], dict) and card["examples_fr"]
+
+def test_failing_source_only_empties_its_fields(server):
+    with PageServer({"wordreference": PAGES["wordreference"]}) as wr_only:
+        card = merged_lookup("mot", fetcher=Fetcher(urls=wr_only.urls))
+    assert set(card["missing"]) == {"wiktionnaire"}
+    assert card["definitions"] and card["definitions_fr"] == {} and card["examples_fr"] == {}
+    assert isinstance(card["examples"], list)
+
+def test_timed_out_source_only_empties_its_fields(server):
+    fetcher = slowed(Fetcher(urls=server.urls), "wordreference", 1.0)
+    start = time.perf_counter()
+    card = merged_lookup("mot", fetcher=fetcher, timeouts={"wordreference": 0.2})
+    assert time.perf_counter() - start < 0.9
+    assert card["missing"] == {"wordreference": "timed out after 0.2s"}
+    assert card["definitions"] == {} and card["examples"] == [] and card["definitions_fr"]
+
+def test_no_source_answering_raises(server):
+    with PageServer({}) as empty:
+        fetcher = slowed(Fetcher(urls=empty.urls), "wordreference", 1.0)
+        with pytest.raises(DefinitionNotFoundError):
+            merged_lookup("mot", fetcher=fetcher, timeouts={"wordreference": 0.2})
+
+def test_hedging_races_a_slow_request(server):
+    # A scheduler must not let the hedged attempt join the slow one
+    fetcher = slowed(Fetcher(urls=server.urls, scheduler=Scheduler()), "wordreference", 2.0, times=1)
+    start = time.perf_counter()
+    card = merged_lookup("mot", fetcher=fetcher, hedge_after={"wordreference": 0.1})
+    assert time.perf_counter() - start < 1.0
+    assert card["missing"] == {} and card["definitions"]
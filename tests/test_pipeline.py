@@ -0,0 +1,44 @@
+import time
+
+from main.bench import synthetic_wordreference
+from main.pipeline import Pipeline
+
+WORDS = [f"mot{i}" for i in range(10)]
+
+class SlowFetcher:
+    '''Serves synthetic pages, earlier words more slowly, so fetches finish out of input order'''
+
+    def fetch(self, source: str, word: str) -> bytes:
+        time.sleep(0.005 * (len(WORDS) - int(word[3:])))
+        return synthetic_wordreference(word)
+
+def pipeline(**kwargs) -> Pipeline:
+    return Pipeline("wordreference", SlowFetcher(), fetch_workers=4, parse_workers=2,
+                    fields=["pronunciations"], **kwargs)
+
+def test_results_in_input_order():
+    results = list(pipeline().run(WORDS))
+    assert [result.word for result in results] == WORDS
+    assert [result.data["target_word"] for result in results] == WORDS
+
+def test_max_pending_bounds_reads():
+    pulled = []
+    def words():
+        for word in WORDS:
+            pulled.append(word)
+            yield word
+    run = pipeline(max_pending=3).run(words())
+    assert next(run).word == "mot0"
+    # The window was full when the writer took the first result, so one more word was read
+    assert len(pulled) == 4
+    run.close()
+
+def test_throughput_counters():
+    line = pipeline()
+    for _ in line.run(WORDS):
+        pass
+    throughput = line.throughput()
+    for stage in ("fetch", "parse", "write"):
+        assert throughput[stage]["items"] == len(WORDS)
+        assert throughput[stage]["per_sec"] > 0
+    assert throughput["fetch"]["busy"] >= 0.005 * sum(range(1, len(WORDS) + 1))
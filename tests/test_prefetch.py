@@ -0,0 +1,20 @@
+from main.bench import PageServer, synthetic_wordreference
+from main.cache import DiskCache
+from main.fetch import Fetcher
+from main.lib import WordReference
+from main.prefetch import Prefetcher
+
+def test_prefetch_warms_the_cache(tmp_path):
+    with PageServer({"wordreference": {"mot": synthetic_wordreference("mot")}}) as server:
+        cache = DiskCache(str(tmp_path))
+        fetcher = Fetcher(urls=server.urls, api_urls=server.api_urls, cache=cache)
+        cache.set("wordreference", "chat", b"page")
+        with Prefetcher(fetcher, budget=2) as prefetcher:
+            assert prefetcher.fetcher.api_urls == server.api_urls
+            prefetcher.submit(["chat", "Chat"])
+            prefetcher.follow(WordReference("mot", fetcher=fetcher))
+            prefetcher.submit(["trop", "tard"])
+        # Already cached pages don't count against the budget, and checking them isn't a cache use
+        assert prefetcher.stats() == {"queued": 3, "fetched": 2, "cached": 1, "failed": 0}
+        assert cache.peek("wordreference", "motr").fresh and cache.peek("wordreference", "mot de terre").fresh
+        assert cache.stats()["hits"] == 0
@@ -0,0 +1,97 @@
+import threading
+import time
+
+from main.scheduler import BULK, INTERACTIVE, Scheduler, TokenBucket, uncoalesced
+
+def start(target, *args) -> threading.Thread:
+    thread = threading.Thread(target=target, args=args)
+    thread.start()
+    return thread
+
+def drained(rate: float = 20.0) -> Scheduler:
+    '''A scheduler whose one-request burst for host "h" is used up'''
+    scheduler = Scheduler({"h": (rate, 1)})
+    scheduler.acquire("h")
+    return scheduler
+
+def test_token_bucket_rate():
+    bucket = TokenBucket(rate=100.0, burst=2)
+    assert bucket.take() == 0 and bucket.take() == 0
+    assert 0 < bucket.take() <= 0.01
+
+def test_rate_limit():
+    scheduler = drained(rate=50.0)
+    begin = time.monotonic()
+    for _ in range(4):
+        scheduler.acquire("h", BULK)
+    assert time.monotonic() - begin >= 0.07
+    # Hosts without a rate aren't limited
+    begin = time.monotonic()
+    for _ in range(100):
+        scheduler.acquire("elsewhere")
+    assert time.monotonic() - begin < 0.05
+
+def test_interactive_before_bulk():
+    scheduler = drained()
+    order = []
+    def request(name: str, priority: int) -> None:
+        scheduler.acquire("h", priority)
+        order.append(name)
+    threads = [start(request, f"bulk{i}", BULK) for i in range(3)]
+    time.sleep(0.01)
+    threads.append(start(request, "interactive", INTERACTIVE))
+    for thread in threads:
+        thread.join()
+    assert order[0] == "interactive"
+    stats = scheduler.stats()["lanes"]
+    assert stats[BULK]["requests"] == 3 and stats[INTERACTIVE]["requests"] == 2
+
+def test_identical_keys_make_one_call():
+    scheduler = Scheduler()
+    calls = []
+    def call() -> str:
+        calls.append(1)
+        time.sleep(0.1)
+        return "page"
+    results = []
+    threads = [start(lambda: results.append(scheduler.run("key", BULK, call))) for _ in range(3)]
+    for thread in threads:
+        thread.join()
+    assert results == ["page"] * 3 and len(calls) == 1
+    assert scheduler.stats()["coalesced"] == 2
+    # Once it is done, the next call with the key runs again
+    scheduler.run("key", BULK, call)
+    assert len(calls) == 2
+
+def test_uncoalesced_bypasses_coalescing():
+    scheduler = Scheduler()
+    calls = []
+    def call() -> None:
+        calls.append(1)
+        time.sleep(0.1)
+    def independent() -> None:
+        with uncoalesced():
+            scheduler.run("key", BULK, call)
+    threads = [start(scheduler.run, "key", BULK, call)] + [start(independent) for _ in range(2)]
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 3 and scheduler.stats()["coalesced"] == 0
+
+def test_joining_interactive_caller_promotes_the_call():
+    scheduler = drained()
+    order = []
+    def bulk_request() -> None:
+        scheduler.acquire("h", BULK)
+        order.append("other bulk")
+    def shared_call() -> None:
+        scheduler.acquire("h", BULK)
+        order.append("shared")
+    threads = [start(bulk_request)]
+    time.sleep(0.01)
+    threads.append(start(scheduler.run, "key", BULK, shared_call))
+    time.sleep(0.01)
+    # Joins the queued bulk call, which moves it to the interactive lane
+    threads.append(start(scheduler.run, "key", INTERACTIVE, shared_call))
+    for thread in threads:
+        thread.join()
+    assert order == ["shared", "other bulk"]
@@ -0,0 +1,93 @@
+import pytest
+
+from main.bench import PageServer, synthetic_wordreference
+from main.fetch import Fetcher
+from main.lib import WordReference
+from main.store import EntryStore
+
+WORDS = ["chat", "mot", "Chien"]
+
+@pytest.fixture
+def server():
+    with PageServer({"wordreference": {word.lower(): synthetic_wordreference(word.lower()) for word in WORDS}}) as server:
+        yield server
+
+def test_get_many(server, tmp_path):
+    store = EntryStore(str(tmp_path / "entries.db"))
+    entries = store.lookup("wordreference", WORDS, Fetcher(urls=server.urls))
+    assert list(entries) == WORDS
+    # Stored under their normalized words, and read back without the network
+    assert set(store.get_many("wordreference", WORDS + ["absent"])) == {"chat", "mot", "chien"}
+    assert store.get("wordreference", "CHIEN") == entries["Chien"]
+    requests = server.requests
+    assert store.lookup("wordreference", WORDS, Fetcher(urls=server.urls)) == entries
+    assert server.requests == requests
+
+def test_parser_version_invalidates(server, tmp_path, monkeypatch):
+    store = EntryStore(str(tmp_path / "entries.db"))
+    store.lookup("wordreference", ["mot"], Fetcher(urls=server.urls))
+    monkeypatch.setattr(WordReference, "PARSER_VERSION", WordReference.PARSER_VERSION + 1)
+    assert store.get("wordreference", "mot") is None
+    # Re-extracted from the full page, not revalidated
+    fetcher = Fetcher(urls=server.urls)
+    assert store.lookup("wordreference", ["mot"], fetcher)
+    assert fetcher.stats()["not_modified"] == 0 and server.not_modified == 0
+    assert store.get("wordreference", "mot") is not None
+
+def test_max_age_expires_rows(server, tmp_path):
+    path = str(tmp_path / "entries.db")
+    EntryStore(path).lookup("wordreference", ["mot"], Fetcher(urls=server.urls))
+    assert EntryStore(path, max_age=3600).get("wordreference", "mot") is not None
+    assert EntryStore(path, max_age=-1).get("wordreference", "mot") is None
+
+def test_unchanged_page_is_touched_not_reparsed(server, tmp_path, monkeypatch):
+    store = EntryStore(str(tmp_path / "entries.db"), max_age=-1)
+    entry = store.lookup("wordreference", ["mot"], Fetcher(urls=server.urls))["mot"]
+    (updated_at,) = store.conn.execute("SELECT updated_at FROM entries").fetchone()
+
+    def reparse(self):
+        raise AssertionError("an unchanged page was parsed again")
+    monkeypatch.setattr(WordReference, "to_dict", reparse)
+    fetcher = Fetcher(urls=server.urls)
+    assert store.lookup("wordreference", ["mot"], fetcher) == {"mot": entry}
+    assert fetcher.stats()["not_modified"] == 1 and server.not_modified == 1
+    assert store.conn.execute("SELECT updated_at FROM entries").fetchone()[0] > updated_at
+
+def entry(word: str, definitions: str, examples: list[str] = ()) -> dict:
+    return {"target_word": word, "definitions": {word: definitions}, "examples": list(examples)}
+
+@pytest.fixture
+def searchable(tmp_path):
+    store = EntryStore(str(tmp_path / "entries.db"))
+    store.put_many("wordreference", [
+        entry("élève", "pupil, student", ["L'élève écoute."]),
+        entry("pomme", "apple", ["Une pomme rouge."]),
+        entry("pommier", "apple tree", ["Le pommier fleurit."]),
+    ])
+    store.put("wiktionnaire", entry("pomme", "Fruit du pommier."))
+    return store
+
+def words(results: list[tuple[str, dict]]) -> set[tuple[str, str]]:
+    return {(source, entry["target_word"]) for source, entry in results}
+
+def test_search_folds_case_and_accents(searchable):
+    assert words(searchable.search("ELEVE")) == {("wordreference", "élève")}
+    assert words(searchable.search("eleve", fields=["definitions"])) == set()
+
+def test_search_prefix(searchable):
+    assert words(searchable.search("pomm*")) == {("wordreference", "pomme"), ("wordreference", "pommier"),
+                                                 ("wiktionnaire", "pomme")}
+    assert words(searchable.search("pomm")) == set()
+    # Every word has to match
+    assert words(searchable.search("apple tree")) == {("wordreference", "pommier")}
+
+def test_search_source_filter(searchable):
+    assert words(searchable.search("pommier", source="wiktionnaire")) == {("wiktionnaire", "pomme")}
+    with pytest.raises(ValueError):
+        searchable.search("pomme", fields=["audio"])
+
+def test_put_many_reindexes(searchable):
+    searchable.put_many("wordreference", [entry("pomme", "fruit")])
+    assert words(searchable.search("apple")) == {("wordreference", "pommier")}
+    assert words(searchable.search("fruit", source="wordreference")) == {("wordreference", "pomme")}
+    assert searchable.conn.execute("SELECT count(*) FROM entry_text").fetchone() == (4,)
@@ -0,0 +1,69 @@
+import sqlite3
+import zipfile
+
+import pytest
+
+from main.anki import export_apkg, note_guid
+from main.bench import PageServer, synthetic_wordreference
+from main.fetch import Fetcher
+from main.pipeline import Pipeline
+from main.sync import CollectionIndex, SyncStats, sync
+
+WORDS = ["chat", "mot", "chien"]
+
+@pytest.fixture
+def server():
+    with PageServer({"wordreference": {word: synthetic_wordreference(word) for word in WORDS}}) as server:
+        yield server
+
+def pipeline(server) -> Pipeline:
+    return Pipeline("wordreference", Fetcher(urls=server.urls), parse_workers=1)
+
+def collection(server, tmp_path, words: list[str]) -> str:
+    '''A collection.anki2 holding the notes of words, as Anki would after importing their export'''
+    path = str(tmp_path / "deck.apkg")
+    export_apkg((result.data for result in pipeline(server).run(words)), path)
+    with zipfile.ZipFile(path) as package:
+        package.extract("collection.anki2", tmp_path)
+    return str(tmp_path / "collection.anki2")
+
+def guids(path: str) -> list[str]:
+    with zipfile.ZipFile(path) as package:
+        package.extract("collection.anki2", path + ".d")
+    conn = sqlite3.connect(path + ".d/collection.anki2")
+    try:
+        return [guid for (guid,) in conn.execute("SELECT guid FROM notes ORDER BY id")]
+    finally:
+        conn.close()
+
+def test_collection_index(server, tmp_path):
+    index = CollectionIndex(collection(server, tmp_path, ["chat", "mot"]))
+    assert len(index) == 2 and "chat" in index and "chien" not in index
+    assert CollectionIndex(str(tmp_path / "collection.anki2"), "Other deck").did is None
+
+def test_sync_adds_only_new_words(server, tmp_path):
+    existing = collection(server, tmp_path, ["chat", "mot"])
+    update = str(tmp_path / "update.apkg")
+    stats = sync(existing, ["chat", "mot", "chien", "chat"], update, pipeline=pipeline(server))
+    assert stats == SyncStats(added=1, skipped=2)
+    assert guids(update) == [note_guid("chien")]
+    # The update is for the collection's own note type and deck, so Anki merges it in
+    index = CollectionIndex(existing)
+    with zipfile.ZipFile(update) as package:
+        package.extract("collection.anki2", tmp_path / "update")
+    conn = sqlite3.connect(tmp_path / "update" / "collection.anki2")
+    assert conn.execute("SELECT mid FROM notes").fetchone() == (index.mid,)
+    assert conn.execute("SELECT did FROM cards").fetchone() == (index.did,)
+    conn.close()
+
+def test_refresh_writes_only_changed_notes(server, tmp_path):
+    existing = collection(server, tmp_path, ["chat", "mot"])
+    update = str(tmp_path / "update.apkg")
+    stats = sync(existing, ["chat", "mot"], update, pipeline=pipeline(server), refresh=True)
+    assert stats == SyncStats(unchanged=2)
+    assert guids(update) == []
+
+    server.pages["wordreference"]["mot"] = synthetic_wordreference("mot", senses=2)
+    stats = sync(existing, ["chat", "mot"], update, pipeline=pipeline(server), refresh=True)
+    assert stats == SyncStats(updated=1, unchanged=1)
+    assert guids(update) == [note_guid("mot")]
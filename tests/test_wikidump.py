@@ -0,0 +1,56 @@
+import bz2
+from xml.sax.saxutils import escape
+
+import pytest
+
+from main.errors import DefinitionNotFoundError
+from main.lib import Wiktionnaire
+from main.wikidump import DumpIndex, build_index, commons_audio
+
+PENDULE = """== {{langue|fr}} ==
+=== {{S|nom|fr}} ===
+'''pendule''' {{pron|pɑ̃.dyl|fr}} {{m}}
+# [[corps|Corps]] suspendu qui [[osciller|oscille]].
+#* ''Le '''pendule''' de Foucault.''
+'''pendule''' {{pron|pɑ̃.dyl|fr}} {{f}}
+# {{lexique|horlogerie|fr}} Petite [[horloge]].
+#* ''La '''pendule''' sonne midi.''
+{{écouter|France|pɑ̃.dyl|lang=fr|audio=Fr-pendule.ogg}}
+
+== {{langue|en}} ==
+'''pendule''' {{m}}
+# Not French.
+"""
+
+def page(title: str, text: str, ns: int = 0) -> str:
+    return f"<page><title>{title}</title><ns>{ns}</ns><revision><text>{text}</text></revision></page>"
+
+@pytest.fixture
+def index(tmp_path):
+    dump = tmp_path / "frwiktionary.xml.bz2"
+    pages = [
+        page("pendule", escape(PENDULE)),
+        page("cat", escape("== {{langue|en}} ==\n'''cat'''\n# A cat.")),
+        page("Annexe:pendule", escape(PENDULE), ns=100),
+    ]
+    dump.write_bytes(bz2.compress(
+        ('<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.11/">' + "".join(pages) + "</mediawiki>").encode()))
+    index = DumpIndex(str(tmp_path / "wiktionnaire.db"))
+    assert build_index(str(dump), index, workers=1) == 1
+    yield index
+    index.close()
+
+def test_lookup_from_dump(index):
+    assert Wiktionnaire("pendule", index=index).to_dict() == {
+        "target_word": "pendule",
+        "definitions": {"pendule (nm)": ["Corps suspendu qui oscille."],
+                        "pendule (nf)": ["(Horlogerie) Petite horloge."]},
+        "pronunciations": ["pɑ̃.dyl"],
+        "examples": {"pendule (nm)": ["Le pendule de Foucault."], "pendule (nf)": ["La pendule sonne midi."]},
+        "audio": [commons_audio("Fr-pendule.ogg")],
+    }
+    assert Wiktionnaire("pendule", index=index).get_genders() == ["(nm)", "(nf)"]
+
+def test_missing_from_dump(index):
+    with pytest.raises(DefinitionNotFoundError):
+        Wiktionnaire("cat", index=index).get_definitions()